@@ -0,0 +1,174 @@
+"""
+asyncio-native text analysis for documents received as async byte streams.
+
+analyze_async() consumes an asyncio.StreamReader (or any async iterable of
+str/bytes chunks) chunk by chunk, like analyze_stream(). The CPU-heavy part
+of each large chunk (lowercasing, punctuation removal, splitting and
+counting) runs in an executor. The event loop only merges the per-chunk
+counts (and n-gram counts, if the accumulator has any), so other
+coroutines keep running while a big body is analyzed.
+"""
+
+import codecs
+import asyncio
+from collections import Counter
+from concurrent.futures import Executor
+from typing import AsyncIterator, Optional, Sequence, Tuple
+
+from smart_text_analyzer import (
+    DEFAULT_CHUNK_SIZE,
+    TextStatistics,
+    _check_fields,
+    _cut_at_whitespace,
+    _select_fields,
+    _state_for_fields
+)
+from ngrams import NgramCounter
+from normalization import normalize
+
+
+# Chunks of text at least this long are counted in the executor
+# Smaller ones cost less to count inline than to hand over to a worker
+OFFLOAD_SIZE = 64 * 1024
+
+
+def _count_words(text: str, ngrams: Optional[NgramCounter] = None,
+                 context: Sequence[str] = ()) -> Tuple[Counter, Optional[NgramCounter],
+                                                       Tuple[str, ...]]:
+    """
+    Executor task: clean and split raw text and count the words.
+
+    With ngrams, the n-grams of the text are counted into it as well,
+    continuing the document from context (see NgramCounter.update()).
+
+    Returns:
+        tuple: (word counts, ngrams, n-gram context for the next text)
+    """
+
+    words = normalize(text).split()
+    if ngrams is not None:
+        context = ngrams.update(words, context)
+    return Counter(words), ngrams, tuple(context)
+
+
+async def _iter_chunks(source, chunk_size: int, encoding: str) -> AsyncIterator[str]:
+    """
+    Yield decoded text chunks from a StreamReader-like object (anything
+    with an async read(n)) or an async iterable of str/bytes chunks.
+    """
+
+    if hasattr(source, 'read'):
+        async def read_chunks():
+            while True:
+                chunk = await source.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+        chunks = read_chunks()
+    elif hasattr(source, '__aiter__'):
+        chunks = source
+    else:
+        raise TypeError(
+            f"Source must be a StreamReader or async iterable of chunks, "
+            f"got {type(source).__name__} instead"
+        )
+
+    decoder = None
+    async for chunk in chunks:
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)()
+            chunk = decoder.decode(chunk)
+        elif not isinstance(chunk, str):
+            raise TypeError(
+                f"Chunks must be str or bytes, got {type(chunk).__name__} instead"
+            )
+        if chunk:
+            yield chunk
+
+    # Flush any bytes the decoder was still holding on to
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+async def analyze_async(source, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        encoding: str = 'utf-8',
+                        executor: Optional[Executor] = None,
+                        offload_size: int = OFFLOAD_SIZE,
+                        state: Optional[TextStatistics] = None,
+                        top_k: Optional[int] = None,
+                        fields=None) -> dict:
+    """
+    Analyze an async byte stream without blocking the event loop.
+
+    Produces exactly the same dictionary as analyze_text() on the whole
+    decoded stream. Words split across chunks are carried over exactly as
+    in analyze_stream(), and memory stays bounded by a few chunks plus the
+    vocabulary.
+
+    Args:
+        source: An asyncio.StreamReader (or any object with an async
+            read(n)), or an async iterable of str/bytes chunks
+        chunk_size (int): Bytes read per chunk from a StreamReader
+        encoding (str): Encoding used to decode bytes chunks
+        executor (Executor): Where large chunks are counted. A
+            ThreadPoolExecutor keeps the loop responsive; a
+            ProcessPoolExecutor also analyzes on other CPUs.
+            Default: the event loop's default executor
+        offload_size (int): Chunks of at least this many characters are
+            counted in the executor, smaller ones inline
+        state (TextStatistics): Optional accumulator to add the stream to.
+            Its n-grams, if any, are counted across chunk boundaries too
+        top_k (int): See analyze_text()
+        fields: See analyze_text()
+
+    Returns:
+        dict: Same keys as analyze_text()
+
+    Raises:
+        TypeError: If source or one of its chunks has an unsupported type
+        ValueError: If chunk_size is not positive or no valid words are found
+    """
+
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be greater than 0")
+    if fields is not None:
+        fields = _check_fields(fields)
+    if state is None:
+        state = _state_for_fields(fields)
+
+    loop = asyncio.get_running_loop()
+    ngrams = state.ngrams
+    context: Tuple[str, ...] = ()
+
+    async def add(text: str) -> None:
+        nonlocal context
+        if len(text) >= offload_size:
+            # The executor counts n-grams into an empty copy (it may be
+            # another process), which is then merged here like the words
+            partial = ngrams.empty_copy() if ngrams is not None else None
+            counts, partial, context = await loop.run_in_executor(
+                executor, _count_words, text, partial, context
+            )
+            if partial is not None:
+                ngrams.merge(partial)
+        else:
+            counts, _, context = _count_words(text, ngrams, context)
+            # A buffered StreamReader returns without suspending, so give
+            # other coroutines a turn between inline chunks
+            await asyncio.sleep(0)
+        state.update_counts(counts)
+
+    carry = []
+    async for chunk in _iter_chunks(source, chunk_size, encoding):
+        head = _cut_at_whitespace(carry, chunk)
+        if head:
+            await add(head)
+    if carry:
+        await add(''.join(carry))
+
+    # Sorting a large vocabulary is CPU-bound as well
+    result = await loop.run_in_executor(executor, state.finalize, top_k)
+    return _select_fields(result, fields)
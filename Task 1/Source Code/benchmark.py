@@ -0,0 +1,591 @@
+"""
+Benchmarks for smart_text_analyzer.
+
+Usage:
+    python benchmark.py [--size-mb 100] [--tokens 10000000] [--repeat 3]
+                        [--only zipf ...] [--save-baseline baseline.json]
+                        [--baseline baseline.json --tolerance 0.1]
+
+With --baseline, the run fails (exit status 1) when any metric is worse
+than the stored one by more than the tolerance.
+"""
+
+import os
+import sys
+import bz2
+import gzip
+import json
+import lzma
+import pickle
+import time
+import random
+import string
+import argparse
+import tempfile
+import tracemalloc
+from itertools import accumulate
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from normalization import normalize
+from serialization import dumps_result, dumps_statistics, loads_result, loads_statistics
+from smart_text_analyzer import TextStatistics, analyze_text, analyze_many, analyze_file
+from word_lengths import numpy, word_length_stats
+
+
+def generate_text(size_bytes: int, vocabulary_size: int = 50000,
+                  seed: int = 0) -> str:
+    """
+    Generate roughly size_bytes of ASCII text for benchmarking.
+
+    Words are drawn uniformly from a fixed random vocabulary, with some
+    capitalization and trailing punctuation so every analyze_text() stage
+    has real work to do.
+
+    Args:
+        size_bytes (int): Approximate size of the generated text
+        vocabulary_size (int): Number of distinct base words
+        seed (int): Random seed, so runs are reproducible
+
+    Returns:
+        str: The generated text
+    """
+
+    rng = random.Random(seed)
+    vocabulary = [
+        ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(1, 12)))
+        for _ in range(vocabulary_size)
+    ]
+    vocabulary += [word.capitalize() + ',' for word in vocabulary[:vocabulary_size // 10]]
+    vocabulary += [word + '.' for word in vocabulary[:vocabulary_size // 10]]
+
+    # Average token is about 7.5 bytes including its separator
+    words = rng.choices(vocabulary, k=max(1, size_bytes * 2 // 15))
+    return ' '.join(words)
+
+
+def _analyze_text_multipass(text: str) -> dict:
+    """
+    Reference copy of the original analyze_text(), which walks the token
+    list once per statistic. Kept here as the benchmark baseline.
+    """
+
+    text_cleaned = text.lower().translate(str.maketrans('', '', string.punctuation))
+    words = [word for word in text_cleaned.split() if word]
+    word_count = len(words)
+    total_length = sum(len(word) for word in words)
+    max_length = max(len(word) for word in words)
+    longest_words = sorted(list(set(
+        [word for word in words if len(word) == max_length]
+    )))
+    word_frequency = dict(Counter(words))
+    word_frequency = dict(sorted(word_frequency.items(), key=lambda x: (-x[1], x[0])))
+    return {
+        "word_count": word_count,
+        "average_word_length": round(total_length / word_count, 2),
+        "longest_words": longest_words,
+        "word_frequency": word_frequency
+    }
+
+
+def best_time(func: Callable, *args, repeat: int = 3) -> float:
+    """Run func(*args) repeat times and return the fastest wall time."""
+
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark_fused_statistics(size_mb: float = 100, repeat: int = 3) -> dict:
+    """
+    Compare the fused single-pass analyze_text() with the original
+    multi-pass implementation on a synthetic input of size_mb megabytes.
+
+    Returns:
+        dict: Timings in seconds, throughputs in MB/s and the speedup
+    """
+
+    text = generate_text(int(size_mb * 1e6))
+    size = len(text) / 1e6
+
+    if analyze_text(text, parallel=False) != _analyze_text_multipass(text):
+        raise AssertionError("Fused and multi-pass results differ")
+
+    multipass = best_time(_analyze_text_multipass, text, repeat=repeat)
+    fused = best_time(lambda t: analyze_text(t, parallel=False), text, repeat=repeat)
+
+    return {
+        "size_mb": round(size, 1),
+        "multipass_seconds": round(multipass, 3),
+        "fused_seconds": round(fused, 3),
+        "multipass_mb_s": round(size / multipass, 1),
+        "fused_mb_s": round(size / fused, 1),
+        "speedup": round(multipass / fused, 2)
+    }
+
+
+def generate_documents(count: int, min_chars: int = 10, max_chars: int = 200,
+                       seed: int = 0) -> List[str]:
+    """
+    Generate count short documents of min_chars to max_chars characters,
+    cut at word boundaries from generate_text() output.
+    """
+
+    rng = random.Random(seed)
+    text = generate_text(count * (max_chars + 1), seed=seed)
+    documents = []
+    position = 0
+    while len(documents) < count:
+        end = position + rng.randint(min_chars, max_chars)
+        document = text[position:end].strip()
+        position = end
+        if position >= len(text):
+            position = 0
+        if document:
+            documents.append(document)
+    return documents
+
+
+def benchmark_batch(count: int = 20000, min_chars: int = 10, max_chars: int = 200,
+                    repeat: int = 3) -> dict:
+    """
+    Measure the per-document cost of the original analyze_text() and the
+    current one in a loop against analyze_many() (row and columnar output)
+    on short documents.
+
+    Returns:
+        dict: Microseconds per document for each variant, and the speedup
+            of analyze_many() over a loop of the current analyze_text()
+            (below 1 means analyze_many() is slower)
+    """
+
+    documents = generate_documents(count, min_chars, max_chars)
+
+    if analyze_many(documents) != [analyze_text(d) for d in documents]:
+        raise AssertionError("analyze_many and analyze_text results differ")
+
+    # Results are kept, as analyze_many() has to keep them
+    def loop(docs, analyze=analyze_text):
+        return [analyze(document) for document in docs]
+
+    per_document = 1e6 / len(documents)
+    original = best_time(
+        lambda docs: loop(docs, _analyze_text_multipass), documents, repeat=repeat
+    ) * per_document
+    single = best_time(loop, documents, repeat=repeat) * per_document
+    rows = best_time(analyze_many, documents, repeat=repeat) * per_document
+    columns = best_time(
+        lambda docs: analyze_many(docs, columnar=True), documents, repeat=repeat
+    ) * per_document
+
+    return {
+        "documents": len(documents),
+        "chars_per_document": f"{min_chars}-{max_chars}",
+        "original_analyze_text_us": round(original, 2),
+        "analyze_text_us": round(single, 2),
+        "analyze_many_us": round(rows, 2),
+        "analyze_many_columnar_us": round(columns, 2),
+        "analyze_many_speedup": round(single / rows, 2),
+        "analyze_many_columnar_speedup": round(single / columns, 2)
+    }
+
+
+def benchmark_word_lengths(tokens: int = 10_000_000, repeat: int = 3) -> dict:
+    """
+    Compare the pure-Python and NumPy backends of word_length_stats() with
+    the length statistics of analyze_text() on an input of about tokens words.
+
+    The NumPy timing is skipped when NumPy is not installed.
+
+    Returns:
+        dict: Timings in seconds and the NumPy speedup over pure Python
+    """
+
+    text = generate_text(tokens * 15 // 2)
+    length_fields = ("word_count", "average_word_length", "longest_words")
+
+    python_stats = word_length_stats(text, backend="python")
+    reference = analyze_text(text, parallel=False, fields=length_fields)
+    if {key: python_stats[key] for key in length_fields} != reference:
+        raise AssertionError("word_length_stats and analyze_text results differ")
+
+    analyze = best_time(
+        lambda t: analyze_text(t, parallel=False, fields=length_fields), text, repeat=repeat
+    )
+    python = best_time(
+        lambda t: word_length_stats(t, backend="python"), text, repeat=repeat
+    )
+    report = {
+        "tokens": python_stats["word_count"],
+        "analyze_text_seconds": round(analyze, 3),
+        "python_seconds": round(python, 3)
+    }
+
+    if numpy is None:
+        report["numpy_seconds"] = "skipped (NumPy not installed)"
+        return report
+
+    if word_length_stats(text, backend="numpy") != python_stats:
+        raise AssertionError("NumPy and pure-Python backends differ")
+    vectorized = best_time(
+        lambda t: word_length_stats(t, backend="numpy"), text, repeat=repeat
+    )
+    report["numpy_seconds"] = round(vectorized, 3)
+    report["speedup_vs_python"] = round(python / vectorized, 2)
+    return report
+
+
+# Format name -> (file suffix, whole-buffer compress, whole-buffer decompress)
+# Fast compression levels keep the benchmark set-up short
+COMPRESSION_FORMATS = {
+    "gzip": (".gz", lambda data: gzip.compress(data, 6), gzip.decompress),
+    "bz2": (".bz2", lambda data: bz2.compress(data, 1), bz2.decompress),
+    "xz": (".xz", lambda data: lzma.compress(data, preset=1), lzma.decompress)
+}
+
+
+def benchmark_compressed(size_mb: float = 100, repeat: int = 3) -> dict:
+    """
+    Compare analyze_file() on a plain file with analyze_file() streaming
+    gzip, bz2 and xz copies of it, and with the old approach of
+    decompressing the whole archive into memory before analyze_text().
+
+    Throughputs are in megabytes of uncompressed text per second.
+
+    Returns:
+        dict: Throughput of every variant in MB/s
+    """
+
+    data = generate_text(int(size_mb * 1e6)).encode('ascii')
+    size = len(data) / 1e6
+    expected = analyze_text(data.decode('ascii'), parallel=False)
+    report = {"size_mb": round(size, 1)}
+
+    with tempfile.TemporaryDirectory() as directory:
+        plain_path = os.path.join(directory, "corpus.txt")
+        with open(plain_path, 'wb') as handle:
+            handle.write(data)
+        report["plain_mb_s"] = round(size / best_time(analyze_file, plain_path, repeat=repeat), 1)
+        
+        for name, (suffix, compress, decompress) in COMPRESSION_FORMATS.items():
+            path = plain_path + suffix
+            with open(path, 'wb') as handle:
+                handle.write(compress(data))
+            
+            if analyze_file(path) != expected:
+                raise AssertionError(f"Streaming {name} result differs")
+            
+            def in_memory(path=path, decompress=decompress):
+                with open(path, 'rb') as handle:
+                    return analyze_text(decompress(handle.read()).decode('ascii'), parallel=False)
+            
+            report[f"{name}_in_memory_mb_s"] = round(size / best_time(in_memory, repeat=repeat), 1)
+            report[f"{name}_streaming_mb_s"] = round(size / best_time(analyze_file, path, repeat=repeat), 1)
+
+    return report
+
+
+def generate_zipf_text(size_bytes: int, vocabulary_size: int = 50000,
+                       exponent: float = 1.1, punctuation_density: float = 0.1,
+                       seed: int = 0) -> str:
+    """
+    Generate roughly size_bytes of ASCII text with Zipf-distributed words.
+
+    The word of rank r is drawn with probability proportional to
+    1 / r**exponent, as in natural language, so the vocabulary seen by
+    analyze_text() grows with the input size like it does on real corpora.
+
+    Args:
+        size_bytes (int): Approximate size of the generated text
+        vocabulary_size (int): Number of distinct base words
+        exponent (float): Zipf exponent; larger values concentrate the
+            occurrences on fewer words
+        punctuation_density (float): Fraction of words (0-1) that are
+            capitalized and followed by a punctuation mark
+        seed (int): Random seed, so runs are reproducible
+
+    Returns:
+        str: The generated text
+    """
+
+    rng = random.Random(seed)
+    vocabulary = [
+        ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(1, 12)))
+        for _ in range(vocabulary_size)
+    ]
+    cumulative = list(accumulate(1 / rank ** exponent for rank in range(1, vocabulary_size + 1)))
+
+    # Zipf-weighted words are on average shorter than 7 bytes with their
+    # separator, so this slightly overshoots and the text is cut at the end
+    words = rng.choices(vocabulary, cum_weights=cumulative, k=max(1, size_bytes // 5))
+    for index in rng.sample(range(len(words)), int(len(words) * punctuation_density)):
+        words[index] = words[index].capitalize() + rng.choice(string.punctuation)
+
+    text = ' '.join(words)
+    return text[:text.rfind(' ', 0, size_bytes + 1)] if len(text) > size_bytes else text
+
+
+def benchmark_zipf(size_mb: float = 100, vocabulary_size: int = 50000,
+                   exponent: float = 1.1, punctuation_density: float = 0.1,
+                   repeat: int = 3) -> dict:
+    """
+    Measure analyze_text() on a Zipf corpus: end-to-end throughput, time
+    of every pipeline stage and peak memory allocated during a call.
+
+    Stages follow analyze_text(): normalize (lowercasing and punctuation
+    removal), split, count (Counter), statistics (fused length pass over the
+    distinct words) and finalize (frequency sort). Peak memory is measured with
+    tracemalloc in a separate run, excluding the input text itself.
+
+    Returns:
+        dict: Throughput, per-stage seconds and peak memory
+    """
+
+    text = generate_zipf_text(int(size_mb * 1e6), vocabulary_size, exponent,
+                              punctuation_density)
+    size = len(text) / 1e6
+
+    cleaned = normalize(text)
+    words = cleaned.split()
+    counts = Counter(words)
+    state = TextStatistics().update_counts(counts)
+
+    stages = {
+        "normalize": best_time(normalize, text, repeat=repeat),
+        "split": best_time(str.split, cleaned, repeat=repeat),
+        "count": best_time(Counter, words, repeat=repeat),
+        "statistics": best_time(
+            lambda c: TextStatistics().update_counts(c), counts, repeat=repeat
+        ),
+        "finalize": best_time(state.finalize, repeat=repeat)
+    }
+    del cleaned, words, counts, state
+
+    total = best_time(lambda t: analyze_text(t, parallel=False), text, repeat=repeat)
+
+    tracemalloc.start()
+    analyze_text(text, parallel=False)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    report = {
+        "size_mb": round(size, 1),
+        "vocabulary_size": vocabulary_size,
+        "analyze_text_seconds": round(total, 3),
+        "analyze_text_mb_s": round(size / total, 1)
+    }
+    for stage, seconds in stages.items():
+        report[f"{stage}_seconds"] = round(seconds, 3)
+    report["peak_memory_mb"] = round(peak / 1e6, 1)
+    return report
+
+
+# Non-ASCII words mixed into the text of the normalization benchmark
+NON_ASCII_WORDS = ["Über", "café,", "Привет", "МИР.", "straße", "İstanbul", "日本語", "Ἀθῆναι"]
+
+
+def benchmark_normalization(size_mb: float = 100, repeat: int = 3) -> dict:
+    """
+    Compare the two-pass cleanup (lower() then a punctuation-deleting
+    translate()) with the fused single-pass normalize() on ASCII text and
+    on text where one word in ten is non-ASCII.
+
+    Returns:
+        dict: Timings in seconds and the speedup for both inputs
+    """
+
+    punctuation_table = str.maketrans('', '', string.punctuation)
+    ascii_text = generate_text(int(size_mb * 1e6))
+    rng = random.Random(0)
+    non_ascii_text = ' '.join(
+        rng.choice(NON_ASCII_WORDS) if rng.random() < 0.1 else word
+        for word in ascii_text.split(' ')
+    )
+
+    report = {"size_mb": round(len(ascii_text) / 1e6, 1)}
+    normalize("é")  # built once per process, not part of the timing
+    for name, text in (("ascii", ascii_text), ("non_ascii", non_ascii_text)):
+        if normalize(text) != text.lower().translate(punctuation_table):
+            raise AssertionError(f"Fused and two-pass results differ on {name} text")
+        two_pass = best_time(
+            lambda t: t.lower().translate(punctuation_table), text, repeat=repeat
+        )
+        fused = best_time(normalize, text, repeat=repeat)
+        report[f"{name}_two_pass_seconds"] = round(two_pass, 3)
+        report[f"{name}_fused_seconds"] = round(fused, 3)
+        report[f"speedup_{name}"] = round(two_pass / fused, 2)
+    return report
+
+
+def benchmark_serialization(size_mb: float = 100, vocabulary_size: int = 50000,
+                            repeat: int = 3) -> dict:
+    """
+    Compare the binary format of serialization.py with pickle and JSON, on
+    the analyze_text() result and on the TextStatistics partial aggregate of
+    a Zipf corpus (what corpus workers exchange).
+
+    Returns:
+        dict: Serialized size in bytes, dump and load seconds per format,
+            and the speedup of the binary format over pickle
+    """
+
+    text = generate_zipf_text(int(size_mb * 1e6), vocabulary_size)
+    state = TextStatistics().update(text)
+    result = state.finalize()
+    del text
+
+    formats = {
+        "result": {
+            "pickle": (lambda r: pickle.dumps(r, pickle.HIGHEST_PROTOCOL), pickle.loads),
+            "json": (lambda r: json.dumps(r, ensure_ascii=False).encode('utf-8'), json.loads),
+            "binary": (dumps_result, loads_result)
+        },
+        "partial": {
+            "pickle": (lambda s: pickle.dumps(s, pickle.HIGHEST_PROTOCOL), pickle.loads),
+            "binary": (dumps_statistics, loads_statistics)
+        }
+    }
+
+    report = {"vocabulary_size": len(result["word_frequency"])}
+    for kind, codecs in formats.items():
+        value = result if kind == "result" else state
+        seconds = {}
+        for name, (dumps, loads) in codecs.items():
+            data = dumps(value)
+            dump_seconds = best_time(dumps, value, repeat=repeat)
+            load_seconds = best_time(loads, data, repeat=repeat)
+            seconds[name] = dump_seconds + load_seconds
+            report[f"{kind}_{name}_bytes"] = len(data)
+            report[f"{kind}_{name}_dump_seconds"] = round(dump_seconds, 4)
+            report[f"{kind}_{name}_load_seconds"] = round(load_seconds, 4)
+        report[f"speedup_{kind}_vs_pickle"] = round(seconds["pickle"] / seconds["binary"], 2)
+    return report
+
+
+# Timings shorter than this are dominated by noise and never gate a run
+MIN_COMPARED_SECONDS = 0.01
+
+
+def _metric_direction(metric: str) -> int:
+    """
+    Whether a larger value of a metric is better (1) or worse (-1), from
+    its name. Other metrics (sizes, counts) describe the input: 0.
+    """
+
+    if metric.endswith("_mb_s") or metric.startswith("speedup"):
+        return 1
+    if metric.endswith(("_seconds", "_us")) or metric.startswith("peak_memory"):
+        return -1
+    return 0
+
+
+def find_regressions(results: Dict[str, dict], baseline: Dict[str, dict],
+                     tolerance: float) -> List[str]:
+    """
+    Compare benchmark results with a stored baseline.
+
+    Args:
+        results: {benchmark name: {metric: value}} of the current run
+        baseline: Same structure, loaded from a previous --save-baseline
+        tolerance (float): Allowed relative degradation, e.g. 0.1 for 10%
+
+    Returns:
+        list: One message per metric that regressed beyond the tolerance
+            (empty if none did)
+    """
+
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            reference = baseline.get(name, {}).get(metric)
+            direction = _metric_direction(metric)
+            if (not direction or not isinstance(value, (int, float))
+                    or not isinstance(reference, (int, float))):
+                continue
+            if metric.endswith("_seconds") and reference < MIN_COMPARED_SECONDS:
+                continue
+            if direction > 0:
+                regressed = value < reference * (1 - tolerance)
+            else:
+                regressed = value > reference * (1 + tolerance)
+            if regressed:
+                regressions.append(f"{name}.{metric}: {value} (baseline {reference})")
+    return regressions
+
+
+BENCHMARKS = {
+    "fused": lambda args: benchmark_fused_statistics(args.size_mb, args.repeat),
+    "batch": lambda args: benchmark_batch(repeat=args.repeat),
+    "lengths": lambda args: benchmark_word_lengths(args.tokens, args.repeat),
+    "compressed": lambda args: benchmark_compressed(args.size_mb, args.repeat),
+    "normalize": lambda args: benchmark_normalization(args.size_mb, args.repeat),
+    "serialize": lambda args: benchmark_serialization(args.size_mb, args.vocabulary,
+                                                      args.repeat),
+    "zipf": lambda args: benchmark_zipf(args.size_mb, args.vocabulary, args.zipf_exponent,
+                                        args.punctuation, args.repeat)
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point: run the benchmarks and print the results.
+
+    Returns 1 if --baseline is given and a metric regressed, else 0.
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmark analyze_text().")
+    parser.add_argument("--size-mb", type=float, default=100,
+                        help="Size of the synthetic input in megabytes")
+    parser.add_argument("--tokens", type=int, default=10_000_000,
+                        help="Number of words of the word-length benchmark input")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per measurement (the best one is kept)")
+    parser.add_argument("--vocabulary", type=int, default=50000,
+                        help="Distinct words of the Zipf corpus")
+    parser.add_argument("--zipf-exponent", type=float, default=1.1,
+                        help="Zipf exponent of the word distribution")
+    parser.add_argument("--punctuation", type=float, default=0.1,
+                        help="Fraction of Zipf corpus words carrying punctuation")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS),
+                        default=sorted(BENCHMARKS),
+                        help="Benchmarks to run (default: all)")
+    parser.add_argument("--save-baseline", metavar="PATH", default=None,
+                        help="Write the results to PATH as a JSON baseline")
+    parser.add_argument("--baseline", metavar="PATH", default=None,
+                        help="Fail if a metric regressed against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Allowed relative regression (default: 0.1 = 10%%)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only:
+        print(f"Benchmark: {name}")
+        print("-" * 50)
+        results[name] = BENCHMARKS[name](args)
+        for key, value in results[name].items():
+            print(f"{key:26} {value}")
+        print()
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+            handle.write("\n")
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            regressions = find_regressions(results, json.load(handle), args.tolerance)
+        if regressions:
+            print(f"Regressions beyond {args.tolerance:.0%} tolerance:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regression beyond {args.tolerance:.0%} tolerance")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Streaming decompression of gzip, bz2 and xz files.
+
+Compressed files are recognized by their magic bytes, not their extension.
+They are decompressed by a background reader thread that feeds fixed-size
+blocks through a bounded queue, so the next block is decompressed while the
+current one is analyzed. zlib, bz2 and lzma release the GIL while they
+work, so decompression and analysis really do overlap. Memory stays
+bounded by the queue depth times the block size.
+"""
+
+import bz2
+import gzip
+import lzma
+import re
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Iterator, Optional
+
+
+# Header at the start of each supported format
+# "BZh" alone is also how plain text can start ("BZhang wrote..."), so bz2
+# requires the block size digit and the magic of the first block (or of
+# the end of an empty stream) as well
+_MAGIC_NUMBERS = (
+    (re.compile(rb'\x1f\x8b'), 'gzip'),
+    (re.compile(rb'BZh[1-9](?:1AY&SY|\x17rE8P\x90)'), 'bz2'),
+    (re.compile(rb'\xfd7zXZ\x00'), 'xz')
+)
+
+_OPENERS = {
+    'gzip': gzip.open,
+    'bz2': bz2.open,
+    'xz': lzma.open
+}
+
+# Decompressed blocks queued ahead of the consumer
+DEFAULT_PREFETCH = 4
+
+# Marks the end of the stream in the queue
+_END = object()
+
+
+def detect_compression(path) -> Optional[str]:
+    """
+    Return 'gzip', 'bz2' or 'xz' if path starts with the header of a
+    compressed file, else None.
+    """
+
+    with open(path, 'rb') as handle:
+        header = handle.read(10)
+    for magic, compression in _MAGIC_NUMBERS:
+        if magic.match(header):
+            return compression
+    return None
+
+
+def iter_decompressed(path, block_size: int, compression: Optional[str] = None,
+                      prefetch: int = DEFAULT_PREFETCH) -> Iterator[bytes]:
+    """
+    Yield the decompressed contents of a file in blocks of block_size bytes,
+    decompressed ahead of time by a reader thread.
+
+    Closing the generator early (or an exception in the consumer) stops the
+    reader thread and closes the file.
+
+    Args:
+        path: Path of the compressed file
+        block_size (int): Decompressed bytes per block
+        compression (str): 'gzip', 'bz2' or 'xz'. Default: detected from
+            the file's magic bytes
+        prefetch (int): Maximum number of blocks decompressed ahead
+
+    Yields:
+        bytes: Decompressed blocks, in order
+
+    Raises:
+        ValueError: If the file is not in a supported compressed format
+        OSError, EOFError, lzma.LZMAError: If the file is corrupt or truncated
+    """
+
+    if compression is None:
+        compression = detect_compression(path)
+    if compression not in _OPENERS:
+        raise ValueError(f"Unsupported or missing compression: {compression!r}")
+
+    blocks: Queue = Queue(maxsize=prefetch)
+    stop = Event()
+
+    def put(item) -> bool:
+        # Wait for room in the queue unless the consumer has gone away
+        while not stop.is_set():
+            try:
+                blocks.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def read_blocks() -> None:
+        try:
+            with _OPENERS[compression](path, 'rb') as handle:
+                while True:
+                    block = handle.read(block_size)
+                    if not block:
+                        break
+                    if not put(block):
+                        return
+        except BaseException as e:
+            # Re-raised in the consumer thread
+            put(e)
+            return
+        put(_END)
+
+    reader = Thread(target=read_blocks, name="decompress-reader", daemon=True)
+    reader.start()
+    try:
+        while True:
+            item = blocks.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # Unblock a reader waiting on a full queue, then wait for it
+        try:
+            while True:
+                blocks.get_nowait()
+        except Empty:
+            pass
+        reader.join()
@@ -0,0 +1,1014 @@
+"""
+Corpus-level text analysis spread over multiple processes.
+
+Files are grouped into shards and each shard is analyzed by a worker of a
+ProcessPoolExecutor into a partial TextStatistics. Partial results are then
+combined pairwise by the workers themselves (a merge tree) instead of being
+folded one after another into a single accumulator in the parent process.
+Partials and per-file results travel between processes in the compact
+binary format of serialization.py; the parent only forwards the bytes of
+partials to the next merge and decodes the final one.
+
+Long runs can be checkpointed: the partials and the positions of the files
+they cover are periodically written to disk, atomically, and a restarted
+run resumes from there without re-reading the completed files.
+
+The combined result is identical to calling analyze_text() on the
+whitespace-joined contents of every file.
+
+This module also provides the command-line interface, also available as
+python -m smart_text_analyzer.
+
+Usage:
+    python corpus_analyzer.py [FILE | DIRECTORY | GLOB | -] [...] [--workers N]
+                              [--output {total,files,both}] [-o OUTPUT]
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+from itertools import chain, islice
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from smart_text_analyzer import (
+    ANALYSIS_FIELDS,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_WINDOW_SIZE,
+    FrequencyView,
+    TextStatistics,
+    _check_fields,
+    _select_fields,
+    run_examples
+)
+from external_counts import SpilledFrequency, SpillingCounts
+from ngrams import NgramCounter
+from serialization import dumps_result, dumps_statistics, loads_result, loads_statistics
+from text_sketches import SpaceSaving
+
+
+# Number of files handed to a worker in one task
+# Large enough to amortize inter-process overhead, small enough to balance
+DEFAULT_FILES_PER_SHARD = 64
+
+# Seconds between two checkpoints of a corpus run
+DEFAULT_CHECKPOINT_INTERVAL = 60
+
+# Format version written in checkpoint headers
+CHECKPOINT_VERSION = 3
+
+# Directories with fewer entries are listed in sorted order; larger ones are
+# streamed in the order the file system returns them
+SORTED_DIRECTORY_LIMIT = 10_000
+
+
+def _iter_directory(path: str) -> Iterator[str]:
+    """
+    Yield the files under a directory recursively, like os.walk(): the files
+    of a directory, then those of each subdirectory. Symbolic links to
+    directories are not followed and unreadable directories are skipped.
+
+    A directory is listed in sorted order when it has fewer than
+    SORTED_DIRECTORY_LIMIT entries. A larger one is streamed in the order
+    the file system returns its entries (the same from one run to the next
+    while it does not change), entering subdirectories as they come, so at
+    most SORTED_DIRECTORY_LIMIT entries of a directory are held in memory.
+    """
+
+    try:
+        scan = os.scandir(path)
+    except OSError:
+        return
+
+    with scan:
+        entries = list(islice(scan, SORTED_DIRECTORY_LIMIT))
+        if len(entries) == SORTED_DIRECTORY_LIMIT:
+            for entry in chain(entries, scan):
+                if not _is_directory(entry):
+                    yield entry.path
+                elif not entry.is_symlink():
+                    yield from _iter_directory(entry.path)
+            return
+
+    entries.sort(key=lambda entry: entry.name)
+    directories = []
+    for entry in entries:
+        if not _is_directory(entry):
+            yield entry.path
+        elif not entry.is_symlink():
+            directories.append(entry.path)
+    for directory in directories:
+        yield from _iter_directory(directory)
+
+
+def _is_directory(entry: os.DirEntry) -> bool:
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def iter_corpus_paths(inputs: Iterable[str]) -> Iterator[str]:
+    """
+    Expand files, directories and glob patterns into a stream of file paths.
+
+    Directories are walked recursively and lazily, in sorted order, so the
+    full file list of a huge corpus is never materialized. A directory with
+    SORTED_DIRECTORY_LIMIT entries or more is streamed unsorted instead of
+    being listed in memory (see _iter_directory()). Glob patterns (with **
+    for any depth) are expanded lazily too, in the order the file system
+    returns matches; matching directories are walked as above. Note that
+    glob lists each directory a pattern is matched against in full.
+
+    Args:
+        inputs: File and/or directory paths, or glob patterns
+
+    Yields:
+        str: Path of every regular file
+
+    Raises:
+        FileNotFoundError: If an input path does not exist or a pattern
+            matches nothing
+    """
+
+    for path in inputs:
+        if os.path.isdir(path):
+            yield from _iter_directory(path)
+        elif os.path.exists(path):
+            yield path
+        elif glob.has_magic(path):
+            matched = False
+            for match in glob.iglob(path, recursive=True):
+                matched = True
+                yield from iter_corpus_paths([match])
+            if not matched:
+                raise FileNotFoundError(f"No files match pattern: {path!r}")
+        else:
+            raise FileNotFoundError(f"No such file or directory: {path!r}")
+
+
+def _file_record(path: str, size: int, state: TextStatistics,
+                 top_k: Optional[int]) -> dict:
+    """
+    Per-file output record: the file's result (serialized, see
+    _load_record()), or why it has none.
+
+    With top_k, only the top_k entries of each frequency table are kept:
+    they are heap-selected, so the full sort that serializing a whole
+    FrequencyView would force never happens.
+    """
+
+    try:
+        result = _limit_frequency(state.finalize(top_k), top_k)
+        return {"path": path, "bytes": size, "result": dumps_result(result)}
+    except ValueError as e:
+        return {"path": path, "bytes": size, "error": str(e)}
+
+
+def _load_record(record: dict) -> dict:
+    """Decode the result of a record built by _file_record()."""
+
+    if "result" in record:
+        record["result"] = loads_result(record["result"])
+    return record
+
+
+def _pack(state: TextStatistics) -> Union[bytes, TextStatistics]:
+    """
+    Serialize a partial accumulator to send it to another process. Spilled
+    counts live in files and are pickled as they are.
+    """
+
+    if isinstance(state.word_frequency, SpillingCounts):
+        return state
+    return dumps_statistics(state)
+
+
+def _unpack(partial: Union[bytes, TextStatistics]) -> TextStatistics:
+    """Inverse of _pack()."""
+
+    return loads_statistics(partial) if isinstance(partial, bytes) else partial
+
+
+def _analyze_shard(paths: List[str], encoding: str, window_size: int,
+                   template: TextStatistics, top_k: Optional[int] = None,
+                   per_file: bool = False,
+                   aggregate: bool = True) -> Tuple[Union[bytes, TextStatistics], int, int,
+                                                    List[dict], List[dict]]:
+    """
+    Worker task: analyze a shard of files into one partial accumulator.
+
+    Files are read through mmap (TextStatistics.update_file()). With
+    per_file, every file is analyzed on its own first and its finalized
+    result recorded before it is merged into the partial accumulator.
+
+    A file that cannot be read or decoded is left out of the partial
+    accumulator and reported instead of failing the whole shard. Without
+    per_file, files are added to the partial accumulator directly, so it is
+    then rebuilt from the files read before the failing one (failures are
+    rare, while a per-file accumulator would cost a merge for every file).
+
+    Returns:
+        tuple: (partial TextStatistics packed by _pack(), number of bytes
+            read, number of files analyzed, per-file records, {"path",
+            "bytes", "error"} records of the files that could not be read)
+    """
+
+    state = template.empty_copy()
+    total_bytes = 0
+    analyzed: List[str] = []
+    records: List[dict] = []
+    failures: List[dict] = []
+    for path in paths:
+        size = None
+        try:
+            size = os.path.getsize(path)
+            if per_file:
+                file_state = template.empty_copy().update_file(path, encoding, window_size)
+            elif aggregate:
+                state.update_file(path, encoding, window_size)
+        except (OSError, UnicodeError) as e:
+            failures.append({"path": path, "bytes": size, "error": str(e)})
+            if aggregate and not per_file:
+                # Part of the file may already have been added
+                state = template.empty_copy()
+                for done in analyzed:
+                    state.update_file(done, encoding, window_size)
+            continue
+
+        analyzed.append(path)
+        total_bytes += size
+        if per_file:
+            records.append(_file_record(path, size, file_state, top_k))
+            if aggregate:
+                state.merge(file_state)
+    return _pack(state), total_bytes, len(analyzed), records, failures
+
+
+def _vocabulary_size(state: TextStatistics) -> int:
+    """
+    Number of words whose frequency state tracks (0 without frequencies, or
+    with spilled counts, whose merge cost does not depend on their size).
+    """
+
+    if state.word_frequency is None or isinstance(state.word_frequency, SpillingCounts):
+        return 0
+    return len(state.word_frequency)
+
+
+def _merge_partials(left: Union[bytes, TextStatistics],
+                    right: Union[bytes, TextStatistics]) -> Tuple[Union[bytes, TextStatistics],
+                                                                  int, int, List[dict],
+                                                                  List[dict]]:
+    """
+    Worker task: merge two packed partial accumulators.
+
+    The smaller vocabulary is folded into the larger one, since merging
+    costs one step per word of the accumulator being merged in.
+
+    Returns:
+        tuple: (merged TextStatistics, packed, 0, 0, [], []) - same shape
+            as _analyze_shard()
+    """
+
+    left, right = _unpack(left), _unpack(right)
+    if _vocabulary_size(left) < _vocabulary_size(right):
+        left, right = right, left
+    return _pack(left.merge(right)), 0, 0, [], []
+
+
+def _path_digest(index: int, path: str) -> int:
+    """64-bit hash of an input and its position."""
+
+    data = index.to_bytes(8, 'little') + os.fsencode(path)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def _coverage(indices: List[int], paths: List[str]) -> List[list]:
+    """
+    Positions covered by a shard, as [start, end, digest] ranges of
+    consecutive input indices. The digest XORs the _path_digest() of every
+    input in the range, so joining two ranges XORs their digests.
+    """
+
+    ranges: List[list] = []
+    for index, path in zip(indices, paths):
+        if ranges and ranges[-1][1] == index:
+            ranges[-1][1] = index + 1
+            ranges[-1][2] ^= _path_digest(index, path)
+        else:
+            ranges.append([index, index + 1, _path_digest(index, path)])
+    return ranges
+
+
+def _merge_coverage(ranges: Iterable[list]) -> List[list]:
+    """Sort ranges and join the adjacent ones."""
+
+    merged: List[list] = []
+    for start, end, digest in sorted(ranges):
+        if merged and merged[-1][1] == start:
+            merged[-1][1] = end
+            merged[-1][2] ^= digest
+        else:
+            merged.append([start, end, digest])
+    return merged
+
+
+def _iter_pending(paths: Iterable[str], completed: List[list]) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (index, path) for every input not covered by the completed
+    ranges of a checkpoint.
+
+    Every path inside a completed range is checked against the range's
+    digest, so a file added, removed or renamed anywhere in it is noticed.
+
+    Raises:
+        ValueError: If the inputs changed since the checkpoint was written
+    """
+
+    position = 0
+    digest = 0
+    count = 0
+    for index, path in enumerate(paths):
+        count = index + 1
+        if position < len(completed) and index >= completed[position][0]:
+            start, end, expected = completed[position]
+            digest ^= _path_digest(index, path)
+            if index == end - 1:
+                if digest != expected:
+                    raise ValueError(
+                        f"Inputs #{start} to #{end - 1} changed since the checkpoint "
+                        f"was written"
+                    )
+                position += 1
+                digest = 0
+            continue
+        yield index, path
+
+    if position < len(completed):
+        raise ValueError(
+            f"Only {count} inputs, but the checkpoint covers up to input "
+            f"#{completed[-1][1] - 1}"
+        )
+
+
+def _checkpoint_config(template: TextStatistics, encoding: str, aggregate: bool,
+                       per_file: bool, top_k: Optional[int]) -> dict:
+    """
+    Settings a checkpoint's partials and records depend on. The template is
+    identified by a digest of its serialized empty copy, which holds its
+    frequency mode, capacities, distinct-word precision and n-gram orders.
+    """
+
+    return {
+        "statistics": hashlib.sha256(dumps_statistics(template.empty_copy())).hexdigest(),
+        "encoding": encoding,
+        "aggregate": aggregate,
+        "per_file": per_file,
+        # Only per-file records are cut to top_k before the end of the run
+        "top_k": top_k if per_file else None
+    }
+
+
+def _write_checkpoint(path: str, config: dict, files: int, failed: int, total_bytes: int,
+                      completed: List[list], partials: List[bytes],
+                      output_offset: Optional[int] = None) -> None:
+    """
+    Atomically replace the checkpoint at path.
+
+    Layout: one JSON header line, then the serialized partials back to
+    back. The file is written under a temporary name in the same directory,
+    synced, then renamed over the previous checkpoint, so a crash at any
+    point leaves either the old or the new checkpoint, never a mix.
+    """
+
+    header = {
+        "version": CHECKPOINT_VERSION,
+        "config": config,
+        "files": files,
+        "failed": failed,
+        "bytes": total_bytes,
+        "output": output_offset,
+        "completed": completed,
+        "partials": [len(partial) for partial in partials]
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(prefix=".checkpoint-", dir=directory)
+    try:
+        with os.fdopen(handle, 'wb') as out:
+            out.write(json.dumps(header).encode('utf-8') + b"\n")
+            out.writelines(partials)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _read_checkpoint(path: str) -> Optional[dict]:
+    """
+    Load a checkpoint written by _write_checkpoint(), or return None if
+    there is none yet.
+
+    Raises:
+        ValueError: If the file is not a checkpoint of this version or is
+            truncated
+    """
+
+    try:
+        handle = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+
+    with handle:
+        try:
+            header = json.loads(handle.readline())
+        except ValueError:
+            raise ValueError(f"Not a corpus checkpoint: {path!r}") from None
+        if not isinstance(header, dict) or header.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version in {path!r}")
+        partials = [handle.read(size) for size in header["partials"]]
+
+    if [len(partial) for partial in partials] != header["partials"]:
+        raise ValueError(f"Truncated checkpoint: {path!r}")
+    header["partials"] = partials
+    return header
+
+
+def analyze_corpus(paths: Iterable[str], workers: Optional[int] = None,
+                   files_per_shard: int = DEFAULT_FILES_PER_SHARD,
+                   encoding: str = 'utf-8',
+                   window_size: int = DEFAULT_WINDOW_SIZE,
+                   top_k: Optional[int] = None,
+                   heavy_hitters: Optional[int] = None,
+                   template: Optional[TextStatistics] = None,
+                   on_file: Optional[Callable[[dict], None]] = None,
+                   on_error: Optional[Callable[[dict], None]] = None,
+                   aggregate: bool = True,
+                   progress: Optional[Callable[[int, int], None]] = None,
+                   checkpoint: Optional[str] = None,
+                   checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+                   checkpoint_output: Optional[IO] = None) -> dict:
+    """
+    Analyze a corpus of files in parallel with a sharded map-reduce.
+
+    Map: every shard of files_per_shard files is analyzed by a worker into
+    a partial TextStatistics. Reduce: as soon as two partials are available
+    they are sent back to the pool to be merged, so merges run in parallel
+    and form a tree. Only a bounded number of shards is in flight at a time
+    and paths are consumed lazily, so the file list itself is never held
+    in memory.
+
+    Throughput grows with the number of workers as long as there are enough
+    shards to keep them busy and the disks can keep up.
+
+    With a checkpoint path, every partial of the completed shards (including
+    those being merged) and the input positions they cover are saved there
+    every checkpoint_interval seconds, and once more if the run fails (e.g.
+    a worker crashed). Calling analyze_corpus() again with the same paths
+    and checkpoint resumes from it: completed files are skipped, not read.
+    The checkpoint is removed once the run completes.
+
+    Args:
+        paths: Iterable of file paths (see iter_corpus_paths() to expand
+            directories)
+        workers (int): Number of worker processes. Default: os.cpu_count()
+        files_per_shard (int): Number of files per worker task
+        encoding (str): Encoding of the files
+        window_size (int): Bytes processed at a time within a file (see
+            analyze_file())
+        top_k (int): Only heap-select the top_k most frequent words instead
+            of sorting the whole vocabulary (see analyze_text())
+        heavy_hitters (int): Keep approximate counts for only this many
+            words per accumulator (SpaceSaving) instead of an exact Counter,
+            bounding memory on huge vocabularies. The result then carries
+            per-word error bounds (see TextStatistics.finalize())
+        template (TextStatistics): Empty accumulator whose configuration
+            every worker copies (see TextStatistics.empty_copy()), e.g.
+            TextStatistics(frequency=None, distinct=True) to only estimate
+            the vocabulary size, or
+            TextStatistics(frequency=SpillingCounts(10**6)) for exact
+            counts with at most a million words in memory per
+            accumulator. Cannot be combined with heavy_hitters.
+        on_file (callable): Called in this process with a record for every
+            file, in shard completion order: {"path", "bytes", "result"},
+            where result is what analyze_file() returns (with top_k, each
+            frequency table holds only its top_k entries), or {"path",
+            "bytes", "error"} for a file without any valid word.
+            Default (None): no per-file results are computed
+        on_error (callable): Called in this process with a {"path",
+            "bytes", "error"} record for every file that could not be read
+            or decoded (removed after listing, unreadable, wrong encoding).
+            Such files are left out of the result instead of stopping the
+            run. Default (None): the records go to on_file, if set
+        aggregate (bool): Combine all files into one corpus result. Pass
+            False with on_file to only get per-file results
+        progress (callable): Called as progress(files, bytes) every time a
+            shard of files has been analyzed
+        checkpoint (str): Path of the checkpoint file to resume from (if it
+            exists) and to keep up to date. paths must list the inputs in
+            the same order and the other arguments must be the same on every
+            run (both are checked). On resume, on_file is not called
+            again for the files completed before the checkpoint
+        checkpoint_interval (float): Minimum seconds between checkpoints
+        checkpoint_output (file): File object that on_file and on_error
+            write the records to. Its position is saved, after syncing it to
+            disk, with every checkpoint; on resume it is truncated back to
+            that position, so the records of files completed after the last
+            checkpoint, which are analyzed again, are not written twice
+
+    Returns:
+        dict: Report dictionary with keys:
+            - result: Same dictionary analyze_text() returns for the
+              concatenated corpus (None if aggregate is False)
+            - files: Number of files analyzed
+            - failed_files: Number of files that could not be read
+            - bytes: Number of bytes read
+            - resumed_files: Number of those files that came from the
+              checkpoint (0 without one)
+            - elapsed_seconds: Wall time of the analysis
+            - throughput_mb_s: Megabytes (10**6 bytes) analyzed per second
+              in this run
+
+    Raises:
+        ValueError: If files_per_shard is not positive, both heavy_hitters
+            and template are given, the corpus contains no valid words, or
+            the checkpoint is invalid, does not match the inputs or is
+            combined with spilled counts
+    """
+
+    if files_per_shard <= 0:
+        raise ValueError("files_per_shard must be greater than 0")
+    if not (aggregate or on_file):
+        raise ValueError("Nothing to compute: aggregate is False and on_file is not set")
+    if heavy_hitters is not None:
+        if template is not None:
+            raise ValueError("heavy_hitters and template are mutually exclusive")
+        template = TextStatistics(frequency=SpaceSaving(heavy_hitters))
+    elif template is None:
+        template = TextStatistics()
+    if checkpoint is not None and isinstance(template.word_frequency, SpillingCounts):
+        raise ValueError("Spilled counts live in temporary files and cannot be checkpointed")
+
+    workers = workers or os.cpu_count() or 1
+
+    # Keep every worker busy while bounding the work queued in the pool
+    max_in_flight = workers * 2
+
+    if on_error is None:
+        on_error = on_file
+
+    start_time = time.perf_counter()
+    files_done = 0
+    failed = 0
+    total_bytes = 0
+
+    # Structure: [(packed partial, coverage ranges)]
+    partials: List[Tuple[Union[bytes, TextStatistics], List[list]]] = []
+
+    completed: List[list] = []
+    resumed = None
+    if checkpoint is not None:
+        config = _checkpoint_config(template, encoding, aggregate, on_file is not None, top_k)
+        resumed = _read_checkpoint(checkpoint)
+    if resumed is not None:
+        changed = [key for key in config if resumed["config"].get(key) != config[key]]
+        if changed:
+            raise ValueError(
+                f"Checkpoint {checkpoint!r} was written with a different "
+                f"{', '.join(changed)} setting; resume with the same options "
+                f"or remove it"
+            )
+        files_done = resumed["files"]
+        failed = resumed["failed"]
+        total_bytes = resumed["bytes"]
+        completed = resumed["completed"]
+        partials = [(partial, []) for partial in resumed["partials"]]
+        if partials:
+            partials[0] = (partials[0][0], completed)
+    resumed_files = files_done
+    resumed_bytes = total_bytes
+
+    output_offset = None
+    if checkpoint_output is not None:
+        if resumed is not None:
+            output_offset = resumed["output"]
+            if output_offset is None:
+                raise ValueError(f"Checkpoint {checkpoint!r} was written without an output file")
+            checkpoint_output.flush()
+            if os.fstat(checkpoint_output.fileno()).st_size < output_offset:
+                raise ValueError("The output file is shorter than when the checkpoint was written")
+            checkpoint_output.truncate(output_offset)
+            checkpoint_output.seek(output_offset)
+        else:
+            output_offset = checkpoint_output.tell()
+    pending = _iter_pending(paths, completed)
+
+    # Structure: {future: (coverage ranges, merged partials or None)}
+    in_flight: Dict = {}
+
+    def save_checkpoint() -> None:
+        # Completed shards are either waiting in partials or being merged
+        packed = [partial for partial, _ in partials]
+        coverage = [ranges for _, ranges in partials]
+        for ranges, inputs in in_flight.values():
+            if inputs is not None:
+                packed.extend(inputs)
+                coverage.append(ranges)
+        if checkpoint_output is not None:
+            os.fsync(checkpoint_output.fileno())
+        _write_checkpoint(
+            checkpoint, config, files_done, failed, total_bytes,
+            _merge_coverage(r for ranges in coverage for r in ranges), packed,
+            output_offset
+        )
+
+    last_checkpoint = time.monotonic()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        exhausted = False
+
+        try:
+            while True:
+                # Map: top up the pool with new shards
+                while not exhausted and len(in_flight) < max_in_flight:
+                    shard = list(islice(pending, files_per_shard))
+                    if not shard:
+                        exhausted = True
+                        break
+                    indices, shard_paths = map(list, zip(*shard))
+                    future = executor.submit(
+                        _analyze_shard, shard_paths, encoding, window_size, template,
+                        top_k, on_file is not None, aggregate
+                    )
+                    in_flight[future] = (_coverage(indices, shard_paths), None)
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    state, shard_bytes, shard_files, records, failures = future.result()
+                    ranges, _ = in_flight.pop(future)
+                    for record in records:
+                        on_file(_load_record(record))
+                    if on_error is not None:
+                        for record in failures:
+                            on_error(record)
+                    if checkpoint_output is not None:
+                        checkpoint_output.flush()
+                        output_offset = checkpoint_output.tell()
+
+                    # Only now that every record of the shard is out does it
+                    # count as completed, and go into checkpoints
+                    total_bytes += shard_bytes
+                    files_done += shard_files
+                    failed += len(failures)
+                    partials.append((state, ranges))
+                    if (shard_files or failures) and progress is not None:
+                        progress(files_done, total_bytes)
+
+                # Reduce: pair up whatever partials are ready and merge them
+                # in the pool, building the merge tree level by level
+                while len(partials) >= 2:
+                    (left, left_ranges), (right, right_ranges) = partials.pop(), partials.pop()
+                    future = executor.submit(_merge_partials, left, right)
+                    in_flight[future] = (left_ranges + right_ranges, (left, right))
+
+                if checkpoint is not None and time.monotonic() - last_checkpoint >= checkpoint_interval:
+                    save_checkpoint()
+                    last_checkpoint = time.monotonic()
+        except BaseException:
+            # Keep what the completed shards produced for the next run
+            if checkpoint is not None:
+                save_checkpoint()
+            raise
+
+    state = _unpack(partials[0][0]) if partials else template.empty_copy()
+    elapsed = time.perf_counter() - start_time
+    run_bytes = total_bytes - resumed_bytes
+
+    result = state.finalize(top_k) if aggregate else None
+    if checkpoint is not None and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    return {
+        "result": result,
+        "files": files_done,
+        "failed_files": failed,
+        "bytes": total_bytes,
+        "resumed_files": resumed_files,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_mb_s": round(run_bytes / 1e6 / elapsed, 2) if elapsed else 0.0
+    }
+
+
+def _limit_frequency(result: dict, top: Optional[int]) -> dict:
+    """
+    Keep only the top entries of every word or n-gram frequency table for
+    output. FrequencyView and SpilledFrequency select them with a heap;
+    plain dicts (e.g. decoded per-file results) are already sorted by
+    (-count, word) and are simply cut.
+    """
+
+    if top is not None:
+        for key, frequency in result.items():
+            if isinstance(frequency, (FrequencyView, SpilledFrequency)):
+                result[key] = dict(frequency.most_common(top))
+            elif key.endswith("_frequency") and isinstance(frequency, dict):
+                result[key] = dict(islice(frequency.items(), top))
+    return result
+
+
+def _iter_json(value, indent: Optional[int] = None, level: int = 0) -> Iterator[str]:
+    """
+    Encode value like json.dumps(value, ensure_ascii=False, indent=indent),
+    in pieces. Mappings are written entry by entry, so a SpilledFrequency
+    streams from disk to the output without being loaded into memory.
+    """
+
+    if isinstance(value, (dict, SpilledFrequency)):
+        entries = ((json.dumps(str(key), ensure_ascii=False), item)
+                   for key, item in value.items())
+        opening, closing = "{", "}"
+    elif isinstance(value, list):
+        entries = ((None, item) for item in value)
+        opening, closing = "[", "]"
+    else:
+        yield json.dumps(value, ensure_ascii=False)
+        return
+
+    if indent is None:
+        separator, newline, closing_newline = ", ", "", ""
+    else:
+        separator = ","
+        newline = "\n" + " " * (indent * (level + 1))
+        closing_newline = "\n" + " " * (indent * level)
+
+    empty = True
+    for key, item in entries:
+        yield (opening if empty else separator) + newline
+        if key is not None:
+            yield key + ": "
+        yield from _iter_json(item, indent, level + 1)
+        empty = False
+    yield opening + closing if empty else closing_newline + closing
+
+
+class _ProgressReporter:
+    """
+    Prints files, bytes and throughput on stderr while the corpus is read.
+
+    On a terminal one status line is rewritten in place at most every
+    interval seconds; otherwise (e.g. a log file) a line is appended at most
+    every 10 intervals so logs stay short.
+    """
+
+    def __init__(self, stream=sys.stderr, interval: float = 0.5):
+        self.stream = stream
+        self.interactive = stream.isatty()
+        self.interval = interval if self.interactive else interval * 10
+        self.start_time = time.perf_counter()
+        self.last_report = 0.0
+
+    def __call__(self, files: int, total_bytes: int) -> None:
+        now = time.perf_counter()
+        if now - self.last_report < self.interval:
+            return
+        self.last_report = now
+        elapsed = now - self.start_time
+        line = (f"{files} files, {total_bytes / 1e6:.1f} MB, "
+                f"{total_bytes / 1e6 / elapsed:.1f} MB/s")
+        if self.interactive:
+            print(f"\r{line}", end="", file=self.stream, flush=True)
+        else:
+            print(line, file=self.stream, flush=True)
+
+    def finish(self) -> None:
+        """End the in-place status line before the summary is printed."""
+
+        if self.interactive and self.last_report:
+            print(file=self.stream)
+
+
+def _analyze_stdin(template: TextStatistics, encoding: str, top_k: Optional[int],
+                   progress: Optional[Callable[[int, int], None]]) -> dict:
+    """Analyze standard input as one document; same report as analyze_corpus()."""
+
+    start_time = time.perf_counter()
+    total_bytes = 0
+
+    def chunks() -> Iterator[bytes]:
+        nonlocal total_bytes
+        for chunk in iter(lambda: sys.stdin.buffer.read(DEFAULT_CHUNK_SIZE), b''):
+            total_bytes += len(chunk)
+            if progress is not None:
+                progress(1, total_bytes)
+            yield chunk
+
+    state = template.empty_copy().update_stream(chunks(), encoding=encoding)
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        "result": state.finalize(top_k),
+        "files": 1,
+        "bytes": total_bytes,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_mb_s": round(total_bytes / 1e6 / elapsed, 2) if elapsed else 0.0
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point (also python -m smart_text_analyzer).
+
+    Inputs are files, directories (walked recursively), glob patterns, or
+    "-" / nothing for standard input. Files are analyzed in parallel with
+    bounded memory: paths are expanded lazily and only a few shards are in
+    flight at a time.
+
+    Output (stdout or --output-file):
+    - total (default): the corpus result as indented JSON
+    - files: one JSON line per file, {"path", "bytes", "result"} or
+      {"path", "bytes", "error"} (no valid words, or the file could not be
+      read or decoded)
+    - both: the per-file lines, then one {"path": null, "files", "bytes",
+      "result"} line with the corpus total
+
+    Progress and a throughput summary go to stderr (--quiet silences them).
+    Files that cannot be read or decoded are skipped; with --output total
+    a warning naming each of them goes to stderr.
+
+    With --checkpoint, an interrupted run started again with the same
+    arguments resumes where the last checkpoint left off. Per-file lines
+    written after that checkpoint are then cut from --output-file (they are
+    written again), so every file appears exactly once.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Analyze text files, directories, glob patterns or stdin "
+                    "in parallel."
+    )
+    parser.add_argument("inputs", nargs="*", default=["-"],
+                        help="Files, directories or glob patterns (quote them; "
+                             "** matches any depth). '-' or nothing: stdin")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--files-per-shard", type=int,
+                        default=DEFAULT_FILES_PER_SHARD,
+                        help="Files per worker task")
+    parser.add_argument("--encoding", default="utf-8",
+                        help="Encoding of the input files")
+    parser.add_argument("--output", choices=("total", "files", "both"),
+                        default="total",
+                        help="Corpus total, per-file JSON Lines, or both "
+                             "(default: total)")
+    parser.add_argument("-o", "--output-file", default=None,
+                        help="Write results to this file instead of stdout")
+    parser.add_argument("--fields", nargs="+", choices=ANALYSIS_FIELDS,
+                        default=None,
+                        help="Only compute these statistics (default: all)")
+    parser.add_argument("--heavy-hitters", type=int, default=None, metavar="N",
+                        help="Approximate word frequencies with N monitored "
+                             "words per worker instead of exact counts")
+    parser.add_argument("--spill-threshold", type=int, default=None, metavar="N",
+                        help="Count words exactly with at most N distinct words "
+                             "in memory per worker, spilling sorted partial "
+                             "counts to temporary files beyond that")
+    parser.add_argument("--spill-dir", default=None,
+                        help="Directory for spilled counts (default: the "
+                             "system temporary directory)")
+    parser.add_argument("--distinct", action="store_true",
+                        help="Estimate the number of distinct words (HyperLogLog)")
+    parser.add_argument("--no-frequency", action="store_true",
+                        help="Skip word frequencies entirely")
+    parser.add_argument("--ngrams", type=int, nargs="+", default=None, metavar="N",
+                        help="Also count n-grams of these orders, e.g. 2 3")
+    parser.add_argument("--ngram-capacity", type=int, default=None, metavar="N",
+                        help="Approximate n-gram counts with N monitored "
+                             "n-grams per order instead of exact counts")
+    parser.add_argument("--top", type=int, default=None,
+                        help="Only print the N most frequent words")
+    parser.add_argument("--checkpoint", metavar="PATH", default=None,
+                        help="Save progress to PATH periodically and resume "
+                             "from it if it exists")
+    parser.add_argument("--checkpoint-interval", type=float,
+                        default=DEFAULT_CHECKPOINT_INTERVAL, metavar="SECONDS",
+                        help="Seconds between checkpoints "
+                             f"(default: {DEFAULT_CHECKPOINT_INTERVAL})")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="No progress or throughput summary on stderr")
+    parser.add_argument("--examples", action="store_true",
+                        help="Print examples of the Python API and exit")
+    args = parser.parse_args(argv)
+
+    if args.examples:
+        run_examples()
+        return 0
+
+    try:
+        fields = _check_fields(args.fields) if args.fields else None
+        if args.no_frequency or (fields is not None and "word_frequency" not in fields):
+            frequency = None
+        elif args.heavy_hitters is not None:
+            if args.spill_threshold is not None:
+                raise ValueError("--heavy-hitters and --spill-threshold are mutually exclusive")
+            frequency = SpaceSaving(args.heavy_hitters)
+        elif args.spill_threshold is not None:
+            frequency = SpillingCounts(args.spill_threshold, args.spill_dir)
+        else:
+            frequency = "exact"
+        ngrams = None
+        if args.ngrams:
+            ngrams = NgramCounter(args.ngrams, args.ngram_capacity)
+        template = TextStatistics(frequency=frequency, distinct=args.distinct, ngrams=ngrams)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if "-" in args.inputs and len(args.inputs) > 1:
+        parser.error("'-' (stdin) cannot be combined with other inputs")
+    if args.checkpoint and args.inputs == ["-"]:
+        parser.error("--checkpoint cannot be used with stdin")
+    if args.checkpoint and args.output != "total" and not args.output_file:
+        parser.error("--checkpoint with per-file output requires --output-file")
+
+    # A resumed run keeps the per-file lines written before the interruption
+    mode = 'w'
+    if args.checkpoint and os.path.exists(args.checkpoint) and args.output != "total":
+        mode = 'a'
+    out = open(args.output_file, mode, encoding='utf-8') if args.output_file else sys.stdout
+
+    def output_result(result: dict) -> dict:
+        if fields is not None:
+            result = _select_fields(result, fields)
+        return _limit_frequency(result, args.top)
+
+    def write_record(record: dict) -> None:
+        if record.get("result") is not None:
+            record["result"] = output_result(record["result"])
+        out.writelines(_iter_json(record))
+        out.write("\n")
+
+    def warn_unreadable(record: dict) -> None:
+        print(f"warning: skipped {record['path']}: {record['error']}", file=sys.stderr)
+
+    progress = None if args.quiet else _ProgressReporter()
+    try:
+        if args.inputs == ["-"]:
+            report = _analyze_stdin(template, args.encoding, args.top, progress)
+            if args.output != "total":
+                write_record({"path": "-", "bytes": report["bytes"],
+                              "result": dict(report["result"])})
+        else:
+            report = analyze_corpus(
+                iter_corpus_paths(args.inputs),
+                workers=args.workers,
+                files_per_shard=args.files_per_shard,
+                encoding=args.encoding,
+                top_k=args.top,
+                template=template,
+                on_file=write_record if args.output != "total" else None,
+                on_error=warn_unreadable if args.output == "total" else None,
+                aggregate=args.output != "files",
+                progress=progress,
+                checkpoint=args.checkpoint,
+                checkpoint_interval=args.checkpoint_interval,
+                checkpoint_output=out if args.checkpoint and args.output != "total" else None
+            )
+
+        if args.output == "total":
+            out.writelines(_iter_json(output_result(report["result"]), indent=2))
+            out.write("\n")
+        elif args.output == "both":
+            write_record({"path": None, "files": report["files"],
+                          "bytes": report["bytes"], "result": report["result"]})
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if progress is not None:
+            progress.finish()
+        if out is not sys.stdout:
+            out.close()
+
+    if not args.quiet:
+        print(f"Analyzed {report['files']} files ({report['bytes']} bytes) in "
+              f"{report['elapsed_seconds']}s: {report['throughput_mb_s']} MB/s",
+              file=sys.stderr)
+        if report.get("failed_files"):
+            print(f"{report['failed_files']} files could not be read and were skipped",
+                  file=sys.stderr)
+        if report.get("resumed_files"):
+            print(f"{report['resumed_files']} files were resumed from {args.checkpoint}",
+                  file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
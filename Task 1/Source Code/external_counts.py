@@ -0,0 +1,355 @@
+"""
+Exact word counts for vocabularies larger than RAM (external aggregation).
+
+SpillingCounts keeps at most max_entries words in an in-memory Counter.
+When that limit is reached, the counts are sorted by word and written to a
+temporary run file, and the Counter starts over. The same word may appear
+in several runs. A k-way merge (heapq.merge) of the runs yields every
+word once, with its total count, in word order.
+
+The frequency-ordered output (most frequent first, then by word, like
+analyze_text()) is produced by an external sort of that merged stream:
+chunks of max_entries words are sorted in memory, spilled, and merged
+again. Memory therefore stays bounded by max_entries words plus one
+buffered line per open run, whatever the size of the vocabulary.
+
+Run files are immutable and deleted as soon as no object refers to them,
+so snapshots and merged aggregates can share them without copying.
+Pickling a run (e.g. to return it from a worker process) hands the file
+over to the receiving side.
+"""
+
+import os
+import heapq
+import tempfile
+import weakref
+from collections import Counter
+from collections.abc import Mapping as MappingABC
+from itertools import groupby, islice
+from operator import itemgetter
+from typing import Iterable, Iterator, List, Mapping, Optional, Tuple
+
+
+# Distinct words kept in memory before spilling a run
+# About 100 MB of Counter for typical words
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+# Runs merged at once; more runs are first compacted into one
+# Bounds the number of open files and the per-run read buffers
+MAX_RUNS = 64
+
+# Read/write buffer per run file
+_BUFFER_SIZE = 64 * 1024
+
+_WORD = itemgetter(0)
+
+
+def _frequency_order(item):
+    """Sort key for (word, count) pairs: most frequent first, then by word."""
+
+    return -item[1], item[0]
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _open_run(path: str, mode: str):
+    # Words never contain whitespace, so tab and newline are safe
+    # separators; surrogatepass keeps lone surrogates (valid in str)
+    return open(path, mode, encoding='utf-8', errors='surrogatepass',
+                newline='\n', buffering=_BUFFER_SIZE)
+
+
+class _Run:
+    """
+    A temporary file of tab-separated pairs, deleted when the last
+    reference to it goes away.
+    """
+
+    def __init__(self, pairs: Iterable[Tuple], directory: Optional[str]):
+        """Write pairs (in the order given) to a new temporary file."""
+
+        handle, self.path = tempfile.mkstemp(prefix="spill-", suffix=".tsv", dir=directory)
+        os.close(handle)
+        self._finalizer = weakref.finalize(self, _remove, self.path)
+        with _open_run(self.path, 'w') as run:
+            run.writelines(f"{first}\t{second}\n" for first, second in pairs)
+
+    def __iter__(self) -> Iterator[List[str]]:
+        """Yield the pairs back as [first, second] strings."""
+
+        with _open_run(self.path, 'r') as run:
+            for line in run:
+                yield line[:-1].split('\t')
+
+    def __getstate__(self) -> str:
+        # The receiving side of the pickle now owns (and deletes) the file
+        self._finalizer.detach()
+        return self.path
+
+    def __setstate__(self, path: str) -> None:
+        self.path = path
+        self._finalizer = weakref.finalize(self, _remove, path)
+
+
+def _iter_word_run(run: _Run) -> Iterator[Tuple[str, int]]:
+    for word, count in run:
+        yield word, int(count)
+
+
+def _iter_frequency_run(run: _Run) -> Iterator[Tuple[str, int]]:
+    for count, word in run:
+        yield word, int(count)
+
+
+class SpillingCounts:
+    """
+    Exact word -> count aggregate that spills to disk instead of growing
+    past max_entries words in memory.
+
+    Drop-in frequency backend for TextStatistics (update(), merge(),
+    items(), len()), for corpora whose vocabulary does not fit in a Counter.
+
+    Key Features:
+    - Counts stay exact, unlike SpaceSaving
+    - Merging adopts the other aggregate's run files instead of reading them
+    - iter_frequency() streams the (-count, word) ordered output through an
+      external sort, and most_common(n) selects the top n with a heap
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 directory: Optional[str] = None):
+        """
+        Initialize empty counts.
+
+        Args:
+            max_entries (int): Distinct words kept in memory before spilling
+            directory (str): Where run files are created. Default: the
+                system temporary directory
+
+        Raises:
+            ValueError: If max_entries <= 0
+        """
+
+        if max_entries <= 0:
+            raise ValueError("max_entries must be greater than 0")
+
+        self.max_entries = max_entries
+        self.directory = directory
+
+        # Counts added since the last spill
+        self.memory: Counter = Counter()
+
+        # Spilled counts, each run sorted by word
+        self.runs: List[_Run] = []
+
+    def empty_copy(self) -> "SpillingCounts":
+        """Return new, empty counts with the same limit and directory."""
+
+        return SpillingCounts(self.max_entries, self.directory)
+
+    def update(self, counts: Mapping[str, int]) -> "SpillingCounts":
+        """
+        Add a batch of word -> count occurrences.
+
+        Returns:
+            SpillingCounts: self, to allow chaining
+        """
+
+        self.memory.update(counts)
+        if len(self.memory) >= self.max_entries:
+            self.spill()
+        return self
+
+    def spill(self) -> None:
+        """Write the in-memory counts to a new run and clear them."""
+
+        if not self.memory:
+            return
+        self._add_run(_Run(sorted(self.memory.items()), self.directory))
+        self.memory = Counter()
+
+    def _add_run(self, run: _Run) -> None:
+        self.runs.append(run)
+        if len(self.runs) > MAX_RUNS:
+            # Compact every run into one, streaming the merge to disk
+            self.runs = [_Run(self._merge_runs(self.runs), self.directory)]
+
+    @staticmethod
+    def _merge_runs(runs: List[_Run]) -> Iterator[Tuple[str, int]]:
+        """Yield (word, total count) over runs, in word order."""
+
+        merged = heapq.merge(*map(_iter_word_run, runs), key=_WORD)
+        for word, group in groupby(merged, key=_WORD):
+            yield word, sum(count for _, count in group)
+
+    def merge(self, other: "SpillingCounts") -> "SpillingCounts":
+        """
+        Fold another aggregate into this one.
+
+        Spilled counts are merged by sharing other's run files, so the cost
+        is one step per word other still holds in memory. other is left
+        unchanged.
+
+        Returns:
+            SpillingCounts: self, to allow chaining
+        """
+
+        if not isinstance(other, SpillingCounts):
+            raise TypeError(
+                f"Can only merge SpillingCounts, got {type(other).__name__} instead"
+            )
+
+        for run in other.runs:
+            self._add_run(run)
+        return self.update(other.memory)
+
+    def snapshot(self) -> "SpillingCounts":
+        """
+        Return a read-only copy of the current counts that later updates
+        do not affect.
+
+        Once counts have been spilled, the in-memory part is spilled too so
+        the copy only shares immutable run files; otherwise the (small)
+        Counter is copied.
+        """
+
+        if self.runs:
+            self.spill()
+        copy = self.empty_copy()
+        copy.runs = list(self.runs)
+        copy.memory = Counter(self.memory)
+        return copy
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """Yield (word, total count) for every word, in word order."""
+
+        if not self.runs:
+            yield from sorted(self.memory.items())
+            return
+        if not self.memory:
+            yield from self._merge_runs(self.runs)
+            return
+        merged = heapq.merge(
+            self._merge_runs(self.runs), sorted(self.memory.items()), key=_WORD
+        )
+        for word, group in groupby(merged, key=_WORD):
+            yield word, sum(count for _, count in group)
+
+    def iter_frequency(self) -> Iterator[Tuple[str, int]]:
+        """
+        Yield (word, count) pairs most frequent first, then by word: the
+        order of analyze_text()'s word_frequency.
+
+        Sorted chunks of max_entries words are spilled and merged, so
+        memory stays bounded however many words there are.
+        """
+
+        items = self.items()
+        chunk = sorted(islice(items, self.max_entries), key=_frequency_order)
+        if len(chunk) < self.max_entries:
+            yield from chunk
+            return
+
+        runs = []
+        while chunk:
+            runs.append(_Run(((count, word) for word, count in chunk), self.directory))
+            chunk = sorted(islice(items, self.max_entries), key=_frequency_order)
+        del chunk
+        yield from heapq.merge(*map(_iter_frequency_run, runs), key=_frequency_order)
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Return the n most frequent (word, count) pairs, or all of them.
+
+        n pairs are selected with a heap over one merge pass; without n,
+        every pair is loaded into memory.
+        """
+
+        if n is None:
+            return list(self.iter_frequency())
+        return heapq.nsmallest(n, self.items(), key=_frequency_order)
+
+    def __getitem__(self, word: str) -> int:
+        """Count of word (0 if absent). Scans every run: O(V)."""
+
+        count = self.memory.get(word, 0)
+        for run in self.runs:
+            for run_word, run_count in _iter_word_run(run):
+                if run_word == word:
+                    count += run_count
+                    break
+                if run_word > word:
+                    break
+        return count
+
+    def __len__(self) -> int:
+        """Number of distinct words. Needs one merge pass once spilled."""
+
+        if not self.runs:
+            return len(self.memory)
+        return sum(1 for _ in self.items())
+
+
+class SpilledFrequency(MappingABC):
+    """
+    Read-only word -> count mapping over a snapshot of SpillingCounts that
+    iterates in (-count, word) order like the sorted word_frequency dict,
+    streaming from disk instead of holding the vocabulary in memory.
+
+    Iteration, items() and values() stream through iter_frequency();
+    most_common(n) uses a heap. Lookups scan the runs, so prefer iteration.
+    """
+
+    def __init__(self, counts: SpillingCounts):
+        """
+        Args:
+            counts (SpillingCounts): Counts to read (not copied, must not
+                change; see SpillingCounts.snapshot())
+        """
+
+        self._counts = counts
+        self._length: Optional[int] = None
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Return the n most frequent (word, count) pairs, or all of them."""
+
+        return self._counts.most_common(n)
+
+    def __getitem__(self, word: str) -> int:
+        count = self._counts[word]
+        if not count:
+            raise KeyError(word)
+        return count
+
+    def __len__(self) -> int:
+        if self._length is None:
+            self._length = len(self._counts)
+        return self._length
+
+    def __iter__(self) -> Iterator[str]:
+        for word, _ in self._counts.iter_frequency():
+            yield word
+
+    def items(self) -> "_StreamedItems":
+        return _StreamedItems(self._counts)
+
+    def values(self) -> Iterator[int]:
+        return (count for _, count in self._counts.iter_frequency())
+
+    def __repr__(self) -> str:
+        return f"SpilledFrequency({len(self)} words)"
+
+
+class _StreamedItems:
+    """items() view of SpilledFrequency: streams pairs in frequency order."""
+
+    def __init__(self, counts: SpillingCounts):
+        self._counts = counts
+
+    def __iter__(self) -> Iterator[Tuple[str, int]]:
+        return self._counts.iter_frequency()
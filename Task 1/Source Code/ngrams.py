@@ -0,0 +1,149 @@
+"""
+Memory-bounded n-gram (bigram, trigram, ...) counting.
+
+N-grams are counted from the same token lists TextStatistics already
+builds, so no extra pass over the text is needed. An n-gram is stored as
+its words joined by single spaces, which is unambiguous (words never
+contain whitespace) and far more compact than a tuple of strings.
+
+The number of distinct n-grams grows much faster than the vocabulary. With
+a capacity, each order is counted in a SpaceSaving summary instead of a
+Counter, which keeps memory fixed and still reports every frequent n-gram
+with a per-n-gram error bound.
+"""
+
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from text_sketches import SpaceSaving
+
+
+# Result key prefix for each order; other orders are named "4gram", ...
+_ORDER_NAMES = {2: "bigram", 3: "trigram"}
+
+# N-grams pre-aggregated at a time before feeding a SpaceSaving summary
+# Bounds the transient Counter when a capacity is set, whatever the batch size
+_SLICE_SIZE = 65536
+
+
+def ngram_name(order: int) -> str:
+    """Name of an n-gram order in results, e.g. 'bigram' for 2."""
+
+    return _ORDER_NAMES.get(order, f"{order}gram")
+
+
+class NgramCounter:
+    """
+    Counts n-grams of one or more orders across batches of tokens.
+
+    A document may arrive in several batches (chunks of a stream, windows
+    of a file): update() returns the last words of a batch, and passing them
+    back as the context of the next batch counts the n-grams spanning the
+    boundary exactly once. Without a context, the batch starts a new
+    document and no n-gram joins it to the previous one.
+
+    Key Features:
+    - Exact counts (Counter) by default
+    - Fixed memory per order with a capacity (SpaceSaving), for corpora
+      whose n-gram vocabulary would not fit in memory
+    - Mergeable, like every other TextStatistics field
+    """
+
+    def __init__(self, orders: Iterable[int] = (2, 3), capacity: Optional[int] = None):
+        """
+        Initialize empty counts.
+
+        Args:
+            orders: N-gram orders to count, each at least 2 (unigrams are
+                TextStatistics.word_frequency)
+            capacity (int): Keep approximate counts for at most this many
+                n-grams per order instead of exact counts. Default (None):
+                exact
+
+        Raises:
+            ValueError: If orders is empty or contains an order below 2, or
+                capacity <= 0
+        """
+
+        orders = tuple(sorted(set(orders)))
+        if not orders or any(not isinstance(n, int) or n < 2 for n in orders):
+            raise ValueError("orders must be integers of at least 2")
+
+        self.orders = orders
+        self.capacity = capacity
+
+        # Structure: {order: Counter or SpaceSaving of "word word ..." keys}
+        self.counts: Dict[int, Union[Counter, SpaceSaving]] = {
+            n: Counter() if capacity is None else SpaceSaving(capacity) for n in orders
+        }
+
+    @property
+    def exact(self) -> bool:
+        """Whether n-grams are counted exactly."""
+
+        return self.capacity is None
+
+    def empty_copy(self) -> "NgramCounter":
+        """Return a new, empty counter with the same orders and capacity."""
+
+        return NgramCounter(self.orders, self.capacity)
+
+    def update(self, words: List[str], context: Sequence[str] = ()) -> Tuple[str, ...]:
+        """
+        Count the n-grams of a batch of cleaned words.
+
+        Args:
+            words (list): Cleaned words of the batch, in order
+            context: Words returned by update() for the previous batch of
+                the same document, or () to start a new document
+
+        Returns:
+            tuple: The context to pass along with the next batch of this
+                document (its last max(orders) - 1 words)
+        """
+
+        sequence = list(context) + words if context else words
+        offset = len(context)
+
+        for n in self.orders:
+            # Skip the n-grams lying entirely inside the context; they were
+            # counted with the previous batch
+            start = max(0, offset - (n - 1))
+            grams = map(' '.join, zip(*(islice(sequence, start + i, None) for i in range(n))))
+            if self.exact:
+                self.counts[n].update(grams)
+                continue
+            summary = self.counts[n]
+            while True:
+                batch = Counter(islice(grams, _SLICE_SIZE))
+                if not batch:
+                    break
+                summary.update(batch)
+
+        return tuple(sequence[-(self.orders[-1] - 1):])
+
+    def merge(self, other: "NgramCounter") -> "NgramCounter":
+        """
+        Fold another counter into this one.
+
+        Returns:
+            NgramCounter: self, to allow chaining
+
+        Raises:
+            TypeError: If other counts different orders or in another mode
+        """
+
+        if not isinstance(other, NgramCounter):
+            raise TypeError(
+                f"Can only merge NgramCounter, got {type(other).__name__} instead"
+            )
+        if other.orders != self.orders or other.exact != self.exact:
+            raise TypeError("Cannot merge n-gram counters with different orders or modes")
+
+        for n, counts in self.counts.items():
+            if self.exact:
+                counts.update(other.counts[n])
+            else:
+                counts.merge(other.counts[n])
+        return self
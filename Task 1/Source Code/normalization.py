@@ -0,0 +1,163 @@
+"""
+Single-pass text normalization with precompiled, cached translation tables.
+
+The default cleanup of analyze_text() is text.lower() followed by deleting
+string.punctuation. A Normalizer folds both into one str.translate() table
+(uppercase -> lowercase, punctuation -> deleted, plus optional digit and
+Unicode-category removal), so cleaning is a single pass over the string.
+Tables are built once per configuration and cached at module level (see
+get_normalizer()).
+
+Two tables are kept per configuration:
+- an ASCII table, used for pure-ASCII text, which str.translate() runs
+  through its ASCII fast path
+- a full Unicode table, built on first use, for any other text
+
+Case folding is identical to str.lower(): a character's lowercase form never
+depends on its neighbours, except for the Greek capital sigma, whose final
+form (at the end of a word) does. Text containing it falls back to lower()
+followed by a deletion-only table.
+"""
+
+import sys
+import string
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Union
+
+
+# Greek capital sigma: lower() maps it to a final or non-final sigma
+# depending on the surrounding letters
+_CAPITAL_SIGMA = 'Σ'
+
+
+class Normalizer:
+    """
+    Lowercases text and removes punctuation (and optionally digits or whole
+    Unicode categories) in a single str.translate() pass.
+
+    Instances are immutable; use get_normalizer() to share one per
+    configuration instead of rebuilding tables.
+    """
+
+    def __init__(self, lowercase: bool = True,
+                 punctuation: str = string.punctuation,
+                 strip_digits: bool = False,
+                 strip_categories: FrozenSet[str] = frozenset()):
+        """
+        Initialize the normalizer and build its ASCII table.
+
+        Args:
+            lowercase (bool): Convert to lowercase like str.lower()
+            punctuation (str): Characters to delete
+            strip_digits (bool): Also delete every decimal digit
+                (str.isdecimal(), so non-ASCII digits too)
+            strip_categories: Unicode general categories to delete, either
+                exact ("Pd") or major classes ("P" for all punctuation)
+        """
+
+        self.lowercase = lowercase
+        self.punctuation = punctuation
+        self.strip_digits = strip_digits
+        self.strip_categories = frozenset(strip_categories)
+
+        self._deleted_ascii = frozenset(
+            chr(code) for code in range(128) if self._is_deleted(chr(code))
+        )
+        self.ascii_table = self._build_table(range(128))
+        self._unicode_table: Optional[Dict[int, Union[str, None]]] = None
+        self._delete_table: Optional[Dict[int, None]] = None
+
+    def _is_deleted(self, char: str) -> bool:
+        """Whether char is removed by this configuration."""
+
+        if char in self.punctuation:
+            return True
+        if self.strip_digits and char.isdecimal():
+            return True
+        if self.strip_categories:
+            category = unicodedata.category(char)
+            return category in self.strip_categories or category[0] in self.strip_categories
+        return False
+
+    def _build_table(self, codes) -> Dict[int, Union[str, None]]:
+        """
+        Translation entries for the given code points, leaving out the
+        characters that map to themselves.
+        """
+
+        is_deleted = self._is_deleted
+        table: Dict[int, Union[str, None]] = {}
+        for code in codes:
+            char = chr(code)
+            if is_deleted(char):
+                table[code] = None
+                continue
+            if not self.lowercase:
+                continue
+            lowered = char.lower()
+            if lowered == char:
+                continue
+            # Lowercasing may produce several characters (e.g. U+0130), and
+            # the deletion rules apply to the lowered text
+            lowered = ''.join(c for c in lowered if not is_deleted(c))
+            table[code] = lowered or None
+        return table
+
+    @property
+    def unicode_table(self) -> Dict[int, Union[str, None]]:
+        """Table covering every code point, built on first use."""
+
+        if self._unicode_table is None:
+            self._unicode_table = self._build_table(range(sys.maxunicode + 1))
+        return self._unicode_table
+
+    @property
+    def delete_table(self) -> Dict[int, None]:
+        """Deletion-only entries of unicode_table, for already lowered text."""
+
+        if self._delete_table is None:
+            self._delete_table = {
+                code: None for code, value in self.unicode_table.items() if value is None
+            }
+        return self._delete_table
+
+    def __call__(self, text: str) -> str:
+        """Return the normalized text."""
+
+        if text.isascii():
+            return text.translate(self.ascii_table)
+        if self.lowercase and _CAPITAL_SIGMA in text:
+            return text.lower().translate(self.delete_table)
+        return text.translate(self.unicode_table)
+
+    def __repr__(self) -> str:
+        return (f"Normalizer(lowercase={self.lowercase}, "
+                f"punctuation={self.punctuation!r}, strip_digits={self.strip_digits}, "
+                f"strip_categories={sorted(self.strip_categories)})")
+
+
+@lru_cache(maxsize=None)
+def _cached_normalizer(lowercase: bool, punctuation: str, strip_digits: bool,
+                       strip_categories: FrozenSet[str]) -> Normalizer:
+    return Normalizer(lowercase, punctuation, strip_digits, strip_categories)
+
+
+def get_normalizer(lowercase: bool = True, punctuation: str = string.punctuation,
+                   strip_digits: bool = False, strip_categories=()) -> Normalizer:
+    """
+    Return the shared Normalizer for a configuration, building its tables
+    only the first time that configuration is requested.
+
+    Args:
+        See Normalizer
+
+    Returns:
+        Normalizer: Cached instance for this configuration
+    """
+
+    return _cached_normalizer(lowercase, punctuation, strip_digits, frozenset(strip_categories))
+
+
+# The cleanup used by analyze_text(): lowercase and delete string.punctuation
+normalize = get_normalizer()
@@ -0,0 +1,399 @@
+"""
+Compact binary serialization of analysis results and TextStatistics.
+
+Word tables dominate both results and partial aggregates, and pickle spends
+a type tag, a length and a memo entry on every word and every count. Here a
+table is stored as two blocks:
+
+- a vocabulary block: the words joined by newlines and UTF-8 encoded once
+  (words never contain whitespace), so loading is one decode() and one
+  split() in C instead of a call per word
+- a count block: one byte per count, plus a list of exceptions (position
+  and full value) for the counts above 255. Word counts follow Zipf's law,
+  so only the few most frequent words are exceptions.
+
+Loading still builds a str and a dict entry for every word, as unpickling
+does, and that dominates its cost: loads take about as long as pickle's.
+The gains are a smaller payload (what workers send through pipes) and
+faster dumps on large vocabularies.
+
+A byte array with exceptions was chosen over varints: it is as compact on
+real counts (one byte for almost every count, where a fixed-width array
+needs the width of the largest one), and unlike varints it is encoded and
+decoded without a Python-level loop over every count.
+
+Layout: a 4-byte magic, a kind byte (result or statistics), then entries of
+(key, type, payload) until the end of the buffer. Integers in headers are
+little-endian; payloads are padded to 8 bytes so arrays stay aligned.
+"""
+
+import re
+import sys
+import struct
+from array import array
+from collections import Counter
+from collections.abc import Mapping as MappingABC
+from typing import Dict, List, Mapping, Tuple
+
+from ngrams import NgramCounter
+from smart_text_analyzer import TextStatistics
+from text_sketches import HyperLogLog, SpaceSaving
+from vocabulary import VocabularyCounts
+
+
+_MAGIC = b'TSA1'
+
+# Kind byte following the magic
+_RESULT = 0
+_STATISTICS = 1
+
+# Entry payload types
+_INT = b'i'
+_FLOAT = b'f'
+_STR = b's'
+_BYTES = b'b'
+_WORDS = b'w'
+_TABLE = b't'
+_INTS = b'a'
+
+# Any non-zero byte: finds the counts whose upper bytes are in use
+_NON_ZERO = re.compile(b'[^\x00]')
+
+_ENTRY_HEADER = struct.Struct('<H1s')
+_SIZE = struct.Struct('<Q')
+_INT_VALUE = struct.Struct('<q')
+_FLOAT_VALUE = struct.Struct('<d')
+
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+# Frequency modes of TextStatistics, by their serialized name
+_FREQUENCY_MODES = {Counter: "exact", VocabularyCounts: "vocabulary", SpaceSaving: "space_saving"}
+
+
+def _padding(size: int) -> bytes:
+    return bytes(-size % 8)
+
+
+def _encode_words(words: List[str]) -> bytes:
+    blob = '\n'.join(words).encode('utf-8', 'surrogatepass')
+    return _SIZE.pack(len(words)) + _SIZE.pack(len(blob)) + blob + _padding(len(blob))
+
+
+def _encode_array(values) -> bytes:
+    packed = array('Q', values)
+    if not _LITTLE_ENDIAN:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _encode_counts(values: List[int]) -> bytes:
+    """Count block: low bytes, then the (position, value) exceptions."""
+
+    try:
+        # Fast path: every count fits in a byte
+        low = bytes(values)
+        positions = []
+    except ValueError:
+        try:
+            raw = array('Q', values)
+        except OverflowError:
+            raise ValueError("Counts must be between 0 and 2**64 - 1") from None
+        if not _LITTLE_ENDIAN:
+            raw.byteswap()
+        raw = raw.tobytes()
+        # Strided slices of the little-endian array: byte 0 of every count,
+        # then its upper bytes, scanned in C for non-zero values
+        low = raw[0::8]
+        exceptions = set()
+        for byte in range(1, 8):
+            exceptions.update(match.start() for match in _NON_ZERO.finditer(raw[byte::8]))
+        positions = sorted(exceptions)
+
+    return (_SIZE.pack(len(low)) + _SIZE.pack(len(positions)) + low + _padding(len(low))
+            + _encode_array(positions) + _encode_array(values[i] for i in positions))
+
+
+def _encode_value(value) -> Tuple[bytes, bytes]:
+    """Return the (type, payload) of one entry value."""
+
+    # bool is an int subclass but would not round-trip as one
+    if isinstance(value, int) and not isinstance(value, bool):
+        return _INT, _INT_VALUE.pack(value)
+    if isinstance(value, float):
+        return _FLOAT, _FLOAT_VALUE.pack(value)
+    if isinstance(value, str):
+        data = value.encode('utf-8', 'surrogatepass')
+        return _STR, _SIZE.pack(len(data)) + data + _padding(len(data))
+    if isinstance(value, (bytes, bytearray)):
+        return _BYTES, _SIZE.pack(len(value)) + bytes(value) + _padding(len(value))
+    if isinstance(value, array):
+        return _INTS, _encode_counts(value.tolist())
+    if isinstance(value, dict):
+        # Iteration order (e.g. by descending count) is preserved
+        return _TABLE, _encode_words(list(value)) + _encode_counts(list(value.values()))
+    if isinstance(value, MappingABC):
+        # FrequencyView, SpilledFrequency: read the sorted items only once
+        words, counts = [], []
+        for word, count in value.items():
+            words.append(word)
+            counts.append(count)
+        return _TABLE, _encode_words(words) + _encode_counts(counts)
+    if isinstance(value, list) and all(isinstance(word, str) for word in value):
+        return _WORDS, _encode_words(value)
+    raise TypeError(f"Cannot serialize values of type {type(value).__name__}")
+
+
+def _encode_entries(kind: int, entries: Mapping) -> bytes:
+    parts = [_MAGIC, bytes([kind]), bytes(3)]
+    for key, value in entries.items():
+        value_type, payload = _encode_value(value)
+        name = key.encode('utf-8')
+        header = _ENTRY_HEADER.pack(len(name), value_type) + name
+        parts.append(header + _padding(len(header)))
+        parts.append(payload)
+    return b''.join(parts)
+
+
+class _Reader:
+    """Decodes entries from a buffer."""
+
+    def __init__(self, data):
+        self.view = memoryview(data)
+        self.offset = 0
+
+    def take(self, size: int, aligned: bool = True) -> memoryview:
+        start = self.offset
+        end = start + size
+        if end > len(self.view):
+            raise ValueError("Truncated serialized data")
+        self.offset = end + (-size % 8 if aligned else 0)
+        return self.view[start:end]
+
+    def size(self) -> int:
+        return _SIZE.unpack(self.take(8))[0]
+
+    def words(self) -> List[str]:
+        count = self.size()
+        blob = self.take(self.size())
+        if not count:
+            return []
+        return str(blob, 'utf-8', 'surrogatepass').split('\n')
+
+    def array(self, length: int) -> array:
+        values = array('Q')
+        values.frombytes(self.take(length * 8))
+        if not _LITTLE_ENDIAN:
+            values.byteswap()
+        return values
+
+    def counts(self) -> Tuple[memoryview, List[Tuple[int, int]]]:
+        """Return the low bytes (a view of the buffer) and the exceptions."""
+
+        length = self.size()
+        exception_count = self.size()
+        low = self.take(length)
+        positions = self.array(exception_count)
+        return low, list(zip(positions, self.array(exception_count)))
+
+    def entry(self) -> Tuple[str, object]:
+        header = self.take(_ENTRY_HEADER.size, aligned=False)
+        name_length, value_type = _ENTRY_HEADER.unpack(header)
+        name = str(self.take(name_length, aligned=False), 'utf-8')
+        self.offset += -(_ENTRY_HEADER.size + name_length) % 8
+
+        if value_type == _INT:
+            return name, _INT_VALUE.unpack(self.take(8))[0]
+        if value_type == _FLOAT:
+            return name, _FLOAT_VALUE.unpack(self.take(8))[0]
+        if value_type == _STR:
+            return name, str(self.take(self.size()), 'utf-8', 'surrogatepass')
+        if value_type == _BYTES:
+            return name, bytes(self.take(self.size()))
+        if value_type == _INTS:
+            low, exceptions = self.counts()
+            values = list(low)
+            for position, value in exceptions:
+                values[position] = value
+            return name, values
+        if value_type == _WORDS:
+            return name, self.words()
+        if value_type == _TABLE:
+            words = self.words()
+            low, exceptions = self.counts()
+            table = dict(zip(words, low))
+            for position, value in exceptions:
+                table[words[position]] = value
+            return name, table
+        raise ValueError(f"Unknown entry type {value_type!r}")
+
+
+def _decode_entries(data, kind: int) -> Dict[str, object]:
+    reader = _Reader(data)
+    header = reader.take(8)
+    if header[:4] != _MAGIC:
+        raise ValueError("Not serialized analysis data")
+    if header[4] != kind:
+        raise ValueError(
+            "Serialized data holds a " + ("result" if header[4] == _RESULT else "TextStatistics")
+        )
+
+    entries = {}
+    while reader.offset < len(reader.view):
+        name, value = reader.entry()
+        entries[name] = value
+    return entries
+
+
+def dumps_result(result: Mapping) -> bytes:
+    """
+    Serialize an analyze_text()-style result dictionary.
+
+    Frequency tables keep their order (FrequencyView and SpilledFrequency
+    values are written in full, in iteration order).
+
+    Args:
+        result: Dictionary of ints, floats, lists of words and
+            word -> count tables
+
+    Returns:
+        bytes: The serialized result
+
+    Raises:
+        TypeError: If a value has an unsupported type
+    """
+
+    return _encode_entries(_RESULT, result)
+
+
+def loads_result(data) -> dict:
+    """
+    Rebuild a result dictionary from dumps_result() output.
+
+    Args:
+        data: bytes, bytearray, memoryview or any other buffer
+
+    Returns:
+        dict: Equal to the serialized result, frequency tables as dicts in
+            their original order
+
+    Raises:
+        ValueError: If data is not a serialized result or is truncated
+    """
+
+    return _decode_entries(data, _RESULT)
+
+
+def _table_entries(entries: dict, key: str, frequency) -> None:
+    """Store a Counter, VocabularyCounts or SpaceSaving under key."""
+
+    if isinstance(frequency, SpaceSaving):
+        entries[f"{key}_capacity"] = frequency.capacity
+        entries[key] = frequency.counts
+        entries[f"{key}_error"] = frequency.errors
+    elif isinstance(frequency, dict):
+        entries[key] = frequency
+    else:
+        entries[key] = dict(frequency.items())
+
+
+def _load_table(entries: dict, key: str, frequency):
+    """
+    Fill an empty Counter, VocabularyCounts or SpaceSaving from entries
+    (update() on an empty Counter copies the dict in C).
+    """
+
+    if isinstance(frequency, SpaceSaving):
+        frequency.counts = entries[key]
+        frequency.errors = entries[f"{key}_error"]
+    else:
+        frequency.update(entries[key])
+    return frequency
+
+
+def dumps_statistics(state: TextStatistics) -> bytes:
+    """
+    Serialize a TextStatistics accumulator (e.g. a partial aggregate to
+    hand to another process).
+
+    A VocabularyCounts backend is written as a plain table; it is loaded
+    back with a private Vocabulary.
+
+    Returns:
+        bytes: The serialized accumulator
+
+    Raises:
+        TypeError: If the frequency backend cannot be serialized (spilled
+            counts live in temporary files)
+    """
+
+    frequency = state.word_frequency
+    if frequency is not None and type(frequency) not in _FREQUENCY_MODES:
+        raise TypeError(
+            f"Cannot serialize {type(frequency).__name__} word frequencies"
+        )
+
+    entries = {
+        "word_count": state.word_count,
+        "total_length": state.total_length,
+        "max_length": state.max_length,
+        "longest_words": sorted(state.longest_words),
+        "frequency_mode": "none" if frequency is None else _FREQUENCY_MODES[type(frequency)]
+    }
+    if frequency is not None:
+        _table_entries(entries, "word_frequency", frequency)
+
+    if state.distinct_words is not None:
+        entries["distinct_registers"] = state.distinct_words.registers
+
+    if state.ngrams is not None:
+        entries["ngram_orders"] = array('Q', state.ngrams.orders)
+        for n, counts in state.ngrams.counts.items():
+            _table_entries(entries, f"ngram_{n}", counts)
+
+    return _encode_entries(_STATISTICS, entries)
+
+
+def loads_statistics(data) -> TextStatistics:
+    """
+    Rebuild a TextStatistics accumulator from dumps_statistics() output.
+
+    Raises:
+        ValueError: If data is not a serialized TextStatistics or is
+            truncated
+    """
+
+    entries = _decode_entries(data, _STATISTICS)
+
+    mode = entries["frequency_mode"]
+    if mode == "none":
+        frequency = None
+    elif mode == "exact":
+        frequency = "exact"
+    elif mode == "vocabulary":
+        frequency = VocabularyCounts()
+    elif mode == "space_saving":
+        frequency = SpaceSaving(entries["word_frequency_capacity"])
+    else:
+        raise ValueError(f"Unknown frequency mode {mode!r}")
+
+    distinct = False
+    registers = entries.get("distinct_registers")
+    if registers is not None:
+        distinct = HyperLogLog(len(registers).bit_length() - 1)
+        distinct.registers = bytearray(registers)
+
+    ngrams = None
+    if "ngram_orders" in entries:
+        orders = entries["ngram_orders"]
+        ngrams = NgramCounter(orders, entries.get(f"ngram_{orders[0]}_capacity"))
+        for n in orders:
+            _load_table(entries, f"ngram_{n}", ngrams.counts[n])
+
+    state = TextStatistics(frequency, distinct, ngrams)
+    state.word_count = entries["word_count"]
+    state.total_length = entries["total_length"]
+    state.max_length = entries["max_length"]
+    state.longest_words = set(entries["longest_words"])
+    if frequency is not None:
+        _load_table(entries, "word_frequency", state.word_frequency)
+    return state
@@ -0,0 +1,267 @@
+"""
+Live word statistics over the most recent part of an unbounded stream.
+
+A SlidingWindowAnalyzer keeps analyze_text()-style statistics for the last
+N words and/or the last T seconds of a stream of messages. Each message only
+touches the words it adds and the words it pushes out of the window, so an
+update costs O(1) amortized per token instead of re-analyzing the whole
+window.
+"""
+
+import time
+from collections import Counter, deque
+from threading import Lock
+from typing import Callable, Deque, Dict, Iterable, Optional, Set
+
+from smart_text_analyzer import _add_frequency
+from normalization import normalize
+
+
+class SlidingWindowAnalyzer:
+    """
+    Word statistics for the last max_words words and/or the last max_age
+    seconds of a stream.
+
+    Key Features:
+    - word_count, average_word_length, longest_words and word_frequency stay
+      exact as words leave the window
+    - Distinct words are indexed by length, so the longest words are known
+      without scanning the window; when the longest ones expire, the next
+      length down is found by a short walk that is paid for by the words
+      that raised it
+    - Count-based and time-based expiry can be combined
+    - Thread-safe: messages can arrive from several threads
+
+    Words of one message share its timestamp, and time-based expiry drops
+    whole messages.
+    """
+
+    def __init__(self, max_words: Optional[int] = None, max_age: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize an empty window.
+
+        Args:
+            max_words (int): Keep at most this many of the most recent words
+            max_age (float): Keep only words added less than this many
+                seconds ago
+            clock: Returns the current time in seconds, used when no
+                timestamp is given. Default: time.monotonic
+
+        Raises:
+            ValueError: If neither limit is given, or a limit is not positive
+        """
+
+        if max_words is None and max_age is None:
+            raise ValueError("At least one of max_words and max_age is required")
+        if max_words is not None and max_words <= 0:
+            raise ValueError("max_words must be greater than 0")
+        if max_age is not None and max_age <= 0:
+            raise ValueError("max_age must be greater than 0")
+
+        self.max_words = max_words
+        self.max_age = max_age
+        self.clock = clock
+
+        # Words in the window, oldest first
+        self.words: Deque[str] = deque()
+
+        # Structure: [timestamp, words of the message still in the window],
+        # oldest message first
+        self.messages: Deque[list] = deque()
+
+        self.word_frequency: Counter = Counter()
+        self.total_length = 0
+
+        # Structure: {length: set of distinct words of that length}
+        self.words_by_length: Dict[int, Set[str]] = {}
+        self.max_length = 0
+
+        self.last_timestamp: Optional[float] = None
+
+        # Protects every field above
+        self.lock = Lock()
+
+    @property
+    def word_count(self) -> int:
+        """Number of words currently in the window."""
+
+        return len(self.words)
+
+    def add(self, text: str, timestamp: Optional[float] = None) -> "SlidingWindowAnalyzer":
+        """
+        Add a message, cleaned like analyze_text() does, to the window.
+
+        A message without valid words is accepted and only advances time.
+
+        Args:
+            text (str): The message text
+            timestamp (float): When the message arrived, on the same scale
+                as clock. Default: clock()
+
+        Returns:
+            SlidingWindowAnalyzer: self, to allow chaining
+
+        Raises:
+            TypeError: If text is not a string
+            ValueError: If timestamp is earlier than a previous one
+        """
+
+        if not isinstance(text, str):
+            raise TypeError(f"Input must be a string, got {type(text).__name__} instead")
+
+        return self.add_words(normalize(text).split(), timestamp)
+
+    def add_words(self, words: Iterable[str],
+                  timestamp: Optional[float] = None) -> "SlidingWindowAnalyzer":
+        """
+        Add a message of already cleaned words to the window.
+
+        Args:
+            words: Cleaned words of the message, in order
+            timestamp (float): See add()
+
+        Returns:
+            SlidingWindowAnalyzer: self, to allow chaining
+
+        Raises:
+            ValueError: If timestamp is earlier than a previous one
+        """
+
+        words = list(words)
+        if timestamp is None:
+            timestamp = self.clock()
+
+        with self.lock:
+            if self.last_timestamp is not None and timestamp < self.last_timestamp:
+                raise ValueError("Timestamps must not decrease")
+            self.last_timestamp = timestamp
+
+            # Words that would leave the window right away are never added
+            if self.max_words is not None and len(words) > self.max_words:
+                words = words[-self.max_words:]
+
+            self._expire(timestamp)
+            if not words:
+                return self
+
+            frequency = self.word_frequency
+            words_by_length = self.words_by_length
+            for word in words:
+                if word not in frequency:
+                    length = len(word)
+                    by_length = words_by_length.get(length)
+                    if by_length is None:
+                        words_by_length[length] = {word}
+                        if length > self.max_length:
+                            self.max_length = length
+                    else:
+                        by_length.add(word)
+                frequency[word] += 1
+                self.total_length += len(word)
+
+            self.words.extend(words)
+            self.messages.append([timestamp, len(words)])
+
+            if self.max_words is not None:
+                excess = len(self.words) - self.max_words
+                if excess > 0:
+                    self._remove_oldest(excess)
+
+        return self
+
+    def _expire(self, now: float) -> None:
+        """Drop the messages that are max_age seconds old or older."""
+
+        if self.max_age is None:
+            return
+        cutoff = now - self.max_age
+        messages = self.messages
+        while messages and messages[0][0] <= cutoff:
+            self._remove_oldest(messages[0][1])
+
+    def _remove_oldest(self, count: int) -> None:
+        """Remove the count oldest words from the window."""
+
+        frequency = self.word_frequency
+        words = self.words
+        messages = self.messages
+
+        for _ in range(count):
+            word = words.popleft()
+            length = len(word)
+            self.total_length -= length
+            remaining = frequency[word] - 1
+            if remaining:
+                frequency[word] = remaining
+                continue
+            del frequency[word]
+            by_length = self.words_by_length[length]
+            by_length.discard(word)
+            if not by_length:
+                del self.words_by_length[length]
+
+        # Messages lose their words oldest first as well
+        while count:
+            message = messages[0]
+            if message[1] > count:
+                message[1] -= count
+                break
+            count -= message[1]
+            messages.popleft()
+
+        # Walk down to the next length still present
+        if not words:
+            self.max_length = 0
+        while self.max_length and self.max_length not in self.words_by_length:
+            self.max_length -= 1
+
+    def result(self, top_k: Optional[int] = None, now: Optional[float] = None) -> dict:
+        """
+        Statistics of the words currently in the window, identical to
+        analyze_text() on the window's words joined by spaces.
+
+        Args:
+            top_k (int): See analyze_text()
+            now (float): Current time, for time-based expiry. Default: the
+                latest of clock() and the last message's timestamp
+
+        Returns:
+            dict: word_count, average_word_length, longest_words and
+                word_frequency
+
+        Raises:
+            ValueError: If the window is empty
+        """
+
+        with self.lock:
+            if self.max_age is not None:
+                if now is None:
+                    now = self.clock()
+                    if self.last_timestamp is not None:
+                        now = max(now, self.last_timestamp)
+                self._expire(now)
+
+            word_count = len(self.words)
+            if not word_count:
+                raise ValueError("No valid words in the window")
+
+            result = {
+                "word_count": word_count,
+                "average_word_length": round(self.total_length / word_count, 2),
+                "longest_words": sorted(self.words_by_length[self.max_length])
+            }
+            _add_frequency(result, "word_frequency", self.word_frequency, top_k)
+            return result
+
+    def clear(self) -> None:
+        """Empty the window."""
+
+        with self.lock:
+            self.words.clear()
+            self.messages.clear()
+            self.word_frequency.clear()
+            self.total_length = 0
+            self.words_by_length.clear()
+            self.max_length = 0
+            self.last_timestamp = None
@@ -1,8 +1,79 @@
+import os
+import re
+import mmap
+import codecs
+import heapq
 import string
-from collections import Counter
+import hashlib
+import tracemalloc
+from time import perf_counter
+from threading import Lock
+from operator import itemgetter
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from collections.abc import Mapping as MappingABC
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple, Union
 
+from compressed_input import detect_compression, iter_decompressed
+from external_counts import SpilledFrequency, SpillingCounts
+from ngrams import NgramCounter, ngram_name
+from normalization import normalize
+from text_sketches import HyperLogLog, SpaceSaving
+from vocabulary import VocabularyCounts
 
-def analyze_text(text):
+
+# Number of characters (text files) or bytes (binary files) read per chunk
+# 1 MiB keeps the per-chunk working set small while amortizing call overhead
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# Inputs with at least this many characters are analyzed in parallel by
+# analyze_text() when more than one CPU is available
+# Below this size, process start-up and pickling cost more than they save
+PARALLEL_THRESHOLD = 32 * 1024 * 1024
+
+# Matches exactly the characters str.split() treats as separators
+_WHITESPACE = re.compile(r'\s')
+
+
+# Bytes-level equivalents used by the memory-mapped file path
+# One table lowercases A-Z and turns the ASCII separators that bytes.split()
+# does not know about (\x1c-\x1f) into spaces; punctuation is deleted in the
+# same translate() call, so cleaning an ASCII window is a single pass
+_BYTES_TABLE = bytes.maketrans(
+    string.ascii_uppercase.encode() + b'\x1c\x1d\x1e\x1f',
+    string.ascii_lowercase.encode() + b'    '
+)
+_BYTES_PUNCTUATION = string.punctuation.encode()
+_BYTES_WHITESPACE = re.compile(rb'[ \t\n\r\x0b\x0c\x1c-\x1f]')
+# Every other byte value; rstrip()ping these cuts a block after its last
+# whitespace byte in time proportional to the trailing partial word
+_BYTES_NON_WHITESPACE = bytes(
+    byte for byte in range(256) if not _BYTES_WHITESPACE.match(bytes([byte]))
+)
+
+# Encodings in which an ASCII byte always stands for that ASCII character,
+# so files can be cut at whitespace bytes and ASCII runs processed as bytes
+_ASCII_COMPATIBLE_ENCODINGS = {'ascii', 'utf-8', 'iso8859-1', 'cp1252'}
+
+# Bytes of a memory-mapped file processed per window
+DEFAULT_WINDOW_SIZE = 8 * 1024 * 1024
+
+# Statistics that can be requested through the fields= parameter, in the
+# order they appear in results
+ANALYSIS_FIELDS = ("word_count", "average_word_length", "longest_words", "word_frequency")
+
+# Stages of analyze_text() reported to the stage hook, in order
+ANALYSIS_STAGES = (
+    "validation", "normalization", "tokenization", "statistics", "frequency_sort",
+    "ngrams"
+)
+
+# Called as hook(stage, seconds, allocated_bytes, text_length) after every stage of
+# analyze_text() when set (see set_stage_hook()); None disables profiling
+_stage_hook = None
+
+
+def analyze_text(text, parallel=None, workers=None, top_k=None, fields=None, ngrams=None):
     """
     Analyzes text and returns comprehensive statistics.
     
@@ -11,12 +82,36 @@ def analyze_text(text):
     
     Args:
         text (str): The input text to analyze. Must be a non-empty string.
+        parallel (bool): Split the text at whitespace and analyze the pieces
+            in worker processes. Default (None): enabled automatically when
+            the text has at least PARALLEL_THRESHOLD characters and more
+            than one CPU is available.
+        workers (int): Number of worker processes for parallel mode.
+            Default: os.cpu_count()
+        top_k (int): When set, word_frequency is a FrequencyView whose first
+            top_k entries are found with a heap instead of sorting the whole
+            vocabulary. Default (None): a fully sorted dict, as always.
+        fields: Names of the statistics to compute, a subset of
+            ANALYSIS_FIELDS. Only those keys are returned and work needed
+            only by the others is skipped: word_count alone needs neither a
+            Counter nor a sort. Default (None): all four.
+        ngrams: N-gram orders to count as well, e.g. (2, 3), or an
+            NgramCounter (to cap memory with a capacity). Adds
+            bigram_frequency, trigram_frequency, ... keys, sorted and
+            limited by top_k like word_frequency. Computed from the same
+            token list; not available in parallel mode.
             
     Raises:
         TypeError: If input is not a string type
-        ValueError: If input is empty or contains no valid words after cleaning
+        ValueError: If input is empty or contains no valid words after
+            cleaning, fields names an unknown statistic, ngrams has an
+            invalid order, or ngrams is combined with parallel=True
     """
     
+    # Profiling is opt-in (see set_stage_hook()); when disabled each stage
+    # only pays for a None check
+    clock = _StageClock(_stage_hook, text) if _stage_hook is not None else None
+    
     # Input Validation
     
     # Check if input is a string
@@ -24,33 +119,61 @@ def analyze_text(text):
         raise TypeError(f"Input must be a string, got {type(text).__name__} instead")
     
     # Check if input is empty or only whitespace
-    if not text.strip():
+    # isspace() stops at the first non-whitespace character and, unlike
+    # strip(), never copies the input
+    if not text or text.isspace():
         raise ValueError("Input string cannot be empty or contain only whitespace")
     
+    # Check requested statistics before doing any work
+    if fields is not None:
+        fields = _check_fields(fields)
     
-    # Text Normalization
+    # N-grams are counted from the token list, in document order
+    if ngrams is not None:
+        if parallel:
+            raise ValueError("ngrams cannot be combined with parallel mode")
+        parallel = False
+        if not isinstance(ngrams, NgramCounter):
+            ngrams = NgramCounter(ngrams)
     
-    # Convert to lowercase for case-insensitive analysis
-    # This ensures "The", "THE", and "the" are counted as the same word
-    text_lower = text.lower()
+    if clock is not None:
+        clock.lap("validation")
     
     
-    # Remove Puncuations
+    # Parallel mode for large inputs
     
-    # Remove punctuation efficiently using translation table
-    # str.maketrans creates a mapping from punctuation characters to None
+    if parallel is None:
+        parallel = len(text) >= PARALLEL_THRESHOLD and (os.cpu_count() or 1) > 1
+    if parallel:
+        result = _analyze_text_parallel(text, workers, top_k, fields)
+        if clock is not None:
+            clock.lap("parallel_analysis")
+        return result
+    
+    
+    # Text Normalization and Punctuation Removal
+    
+    # Convert to lowercase for case-insensitive analysis
+    # This ensures "The", "THE", and "the" are counted as the same word
+    # Lowercasing and punctuation removal share one translation table,
+    # precompiled and cached at module level (see normalization.py), so
+    # the entire string is cleaned in a single translate() pass
     # This approach is more efficient than regex or list comprehensions
-    # because it processes the entire string in a single pass
-    translator = str.maketrans('', '', string.punctuation)
-    text_cleaned = text_lower.translate(translator)
+    text_cleaned = normalize(text)
+    
+    if clock is not None:
+        clock.lap("normalization")
     
     
     # Tokanization
     
     # Split text into individual words
-    # The list comprehension filters out empty strings that result from
-    # punctuation removal (e.g., "word,word" becomes ["word", "", "word"])
-    words = [word for word in text_cleaned.split() if word]
+    # split() without arguments never returns empty strings, so no extra
+    # filtering pass is needed (e.g., "word,word" becomes "wordword")
+    words = text_cleaned.split()
+    
+    if clock is not None:
+        clock.lap("tokenization")
     
     
     # Validation - after the cleaning
@@ -60,65 +183,1349 @@ def analyze_text(text):
         raise ValueError("No valid words found after removing punctuation")
     
     
-    # Calculate word count
+    # Selected statistics
+    
+    # Only the requested fields are computed, each with the cheapest
+    # C-level pass that produces it (see _select_statistics)
+    if fields is not None:
+        result = _select_statistics(words, fields, top_k)
+        if clock is not None:
+            clock.lap("statistics")
+    
+    
+    # Fused statistics
+    
+    else:
+        # Counter(words) is the only pass over the tokens and runs in C
+        # Word count, total length (length x count), maximum length and the
+        # longest words are then all derived in one walk over the distinct
+        # words, which is far smaller than the token list
+        # finalize() sorts the frequencies by (-count, word) and rounds the
+        # average to 2 decimal places, exactly as before
+        state = TextStatistics().update_counts(Counter(words))
+        if clock is not None:
+            clock.lap("statistics")
+        
+        result = state.finalize(top_k)
+        if clock is not None:
+            clock.lap("frequency_sort")
+    
+    
+    # N-gram frequencies
+    
+    # Same token list, one zip() pass per order (see NgramCounter)
+    if ngrams is not None:
+        ngrams.update(words)
+        _add_ngram_frequencies(result, ngrams, top_k)
+        if clock is not None:
+            clock.lap("ngrams")
     
-    # Simply the length of our words list
+    return result
+
+
+def set_stage_hook(hook):
+    """
+    Installs a profiling hook called after every stage of analyze_text().
+    
+    The hook is called as hook(stage, seconds, allocated_bytes,
+    text_length) in the calling thread, with stage one of ANALYSIS_STAGES
+    (or "parallel_analysis", which covers every stage in parallel mode).
+    allocated_bytes is the peak memory the stage allocated, measured with
+    tracemalloc, or None when tracemalloc is not tracing (see
+    StageProfiler(trace_memory=True)). text_length is the length of the
+    input, to relate slow stages to input shapes. Time spent in the hook
+    itself is not counted.
+    
+    The hook is process-wide. When no hook is installed analyze_text()
+    only pays one None check per stage.
+    
+    Args:
+        hook (callable): The hook, e.g. a StageProfiler, or None to
+            disable profiling
+    
+    Returns:
+        The previously installed hook (None if there was none), so it can
+        be restored
+    """
+    
+    global _stage_hook
+    previous, _stage_hook = _stage_hook, hook
+    return previous
+
+
+class _StageClock:
+    """Measures consecutive stages of one analyze_text() call for a hook."""
+    
+    __slots__ = ("hook", "length", "tracing", "baseline", "start")
+    
+    def __init__(self, hook, text):
+        self.hook = hook
+        self.length = len(text) if isinstance(text, str) else None
+        self.tracing = tracemalloc.is_tracing()
+        if self.tracing:
+            tracemalloc.reset_peak()
+            self.baseline = tracemalloc.get_traced_memory()[0]
+        self.start = perf_counter()
+    
+    def lap(self, stage):
+        """Reports the stage that just ended and starts timing the next one."""
+        
+        seconds = perf_counter() - self.start
+        allocated = None
+        if self.tracing:
+            allocated = tracemalloc.get_traced_memory()[1] - self.baseline
+        
+        self.hook(stage, seconds, allocated, self.length)
+        
+        # Whatever the hook allocated is not charged to the next stage
+        if self.tracing:
+            tracemalloc.reset_peak()
+            self.baseline = tracemalloc.get_traced_memory()[0]
+        self.start = perf_counter()
+
+
+def _check_fields(fields):
+    """
+    Validates a fields= argument and returns it as a frozenset.
+    
+    Raises:
+        ValueError: If fields is empty or names an unknown statistic
+    """
+    
+    if isinstance(fields, str):
+        fields = (fields,)
+    fields = frozenset(fields)
+    unknown = fields.difference(ANALYSIS_FIELDS)
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(sorted(unknown))} "
+            f"(expected a subset of {', '.join(ANALYSIS_FIELDS)})"
+        )
+    if not fields:
+        raise ValueError("fields must name at least one statistic")
+    return fields
+
+
+def _select_fields(result, fields):
+    """Keeps only the requested fields of a full result, in canonical order."""
+    
+    if fields is None:
+        return result
+    return {name: result[name] for name in ANALYSIS_FIELDS if name in fields}
+
+
+def _state_for_fields(fields):
+    """Returns an empty accumulator that only counts words if needed."""
+    
+    if fields is None or "word_frequency" in fields:
+        return TextStatistics()
+    return TextStatistics(frequency=None)
+
+
+def _select_statistics(words, fields, top_k=None):
+    """
+    Computes only the requested statistics from a non-empty token list.
+    
+    - word_count: len() of the list, nothing else
+    - average_word_length: one sum(map(len)) pass, no Counter
+    - longest_words: max length over the tokens, then a filter over the
+      distinct words (set() or the Counter keys)
+    - word_frequency: the only field that needs a Counter and a sort
+    """
+    
+    result = {}
     word_count = len(words)
+    counts = Counter(words) if "word_frequency" in fields else None
+    
+    if "word_count" in fields:
+        result["word_count"] = word_count
+    
+    if "average_word_length" in fields:
+        result["average_word_length"] = round(sum(map(len, words)) / word_count, 2)
+    
+    if "longest_words" in fields:
+        vocabulary = counts if counts is not None else set(words)
+        max_length = max(map(len, vocabulary))
+        result["longest_words"] = sorted(
+            word for word in vocabulary if len(word) == max_length
+        )
+    
+    if counts is not None:
+        result["word_frequency"] = (
+            dict(_sort_frequency(counts)) if top_k is None
+            else FrequencyView(counts, top_k)
+        )
+    
+    return result
+
+
+def _iter_text_chunks(source, chunk_size, encoding):
+    """
+    Yields text chunks from a path, a file object or an iterable of chunks.
+    
+    Bytes chunks are decoded with an incremental decoder so multi-byte
+    characters that straddle a chunk boundary are never corrupted.
+    """
+    
+    # A path is opened in text mode and read in fixed-size chunks
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r', encoding=encoding) as handle:
+            yield from _iter_text_chunks(handle, chunk_size, encoding)
+        return
+    
+    # File objects (text or binary) are read chunk by chunk
+    if hasattr(source, 'read'):
+        def read_chunks(read=source.read):
+            while True:
+                chunk = read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+        chunks = read_chunks()
+    else:
+        try:
+            chunks = iter(source)
+        except TypeError:
+            raise TypeError(
+                f"Source must be a path, file object or iterable of chunks, "
+                f"got {type(source).__name__} instead"
+            ) from None
+    
+    decoder = None
+    for chunk in chunks:
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)()
+            chunk = decoder.decode(chunk)
+        elif not isinstance(chunk, str):
+            raise TypeError(
+                f"Chunks must be str or bytes, got {type(chunk).__name__} instead"
+            )
+        if chunk:
+            yield chunk
+    
+    # Flush any bytes the decoder was still holding on to
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+def _iter_word_batches(chunks):
+    """
+    Turns a sequence of raw text chunks into lists of cleaned words.
+    
+    The trailing partial word of every chunk is carried over into the next
+    one, so words split across chunk boundaries are counted exactly once.
+    The carry is kept as raw text and only cut at whitespace, which keeps
+    case folding identical to lowering the whole document at once.
+    """
+    
+    carry = []
+    for chunk in chunks:
+        head = _cut_at_whitespace(carry, chunk)
+        if head:
+            yield normalize(head).split()
+    
+    if carry:
+        yield normalize(''.join(carry)).split()
+
+
+def _cut_at_whitespace(carry, chunk):
+    """
+    Adds a raw text chunk after the partial word carried over so far.
+    
+    carry is the list of pieces of that partial word; it is only joined
+    once the word ends, and only chunk is searched for whitespace, so a
+    very long run without whitespace costs linear time, not quadratic.
+    
+    Returns:
+        str: The text up to the last whitespace of chunk, carry included,
+            or '' if chunk has no whitespace. carry then holds the new
+            trailing partial word.
+    """
+    
+    head, tail = _split_partial_word(chunk)
+    if head and carry:
+        carry.append(head)
+        head = ''.join(carry)
+        carry.clear()
+    if tail:
+        carry.append(tail)
+    return head
+
+
+def _split_partial_word(buffer):
+    """
+    Cuts raw text after its last whitespace character.
+    
+    Returns (head, carry): head is made of complete words, carry is the
+    trailing partial word that may continue in the next chunk. head is
+    empty when buffer contains no whitespace at all.
+    """
+    
+    if buffer[-1].isspace():
+        return buffer, ''
+    parts = buffer.rsplit(None, 1)
+    if len(parts) < 2:
+        # A single word, possibly after leading whitespace
+        return buffer[:len(buffer) - len(parts[0])], parts[0]
+    return parts[0], parts[1]
+
+
+def _frequency_order(item):
+    """Sort key for (word, count) pairs: most frequent first, then by word."""
+    
+    return -item[1], item[0]
+
+
+def _sort_frequency(counts):
+    """
+    Returns the (word, count) pairs of counts in (-count, word) order.
+    
+    Same order as sorting with _frequency_order, but done as two sorts with
+    C-level keys: by word first (plain tuple comparison, words are unique),
+    then stably by count in reverse. This avoids one Python-level key call
+    per distinct word.
+    """
+    
+    items = sorted(counts.items())
+    items.sort(key=_COUNT, reverse=True)
+    return items
+
+
+_COUNT = itemgetter(1)
+
+
+class FrequencyView(MappingABC):
+    """
+    Read-only word -> count mapping that iterates like the sorted
+    word_frequency dict, but only sorts what is actually read.
+    
+    The first top_k entries are selected with a heap in O(V log k). The rest
+    of the vocabulary is sorted only if iteration goes past them, so callers
+    that read a handful of entries never pay for the full O(V log V) sort.
+    Lookups, len() and membership tests never sort at all.
+    """
+    
+    def __init__(self, counts: Mapping[str, int], top_k: int):
+        """
+        Args:
+            counts: Word -> count mapping (not copied, must not change)
+            top_k (int): Number of entries selected with a heap
+        
+        Raises:
+            ValueError: If top_k is negative
+        """
+        
+        if top_k < 0:
+            raise ValueError("top_k must be 0 or greater")
+        
+        self._counts = counts
+        self._top_k = top_k
+        self._top: Optional[List[Tuple[str, int]]] = None
+        self._ordered: Optional[List[Tuple[str, int]]] = None
+    
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Return the n most frequent (word, count) pairs, or all of them.
+        
+        Uses the heap selection when n <= top_k, a full sort otherwise.
+        """
+        
+        if n is not None and n <= self._top_k and self._ordered is None:
+            return self._select_top()[:n]
+        return self._sort_all()[:n]
     
+    def _select_top(self) -> List[Tuple[str, int]]:
+        if self._top is None:
+            self._top = heapq.nsmallest(
+                self._top_k, self._counts.items(), key=_frequency_order
+            )
+        return self._top
     
-    # Average Word length calculation
+    def _sort_all(self) -> List[Tuple[str, int]]:
+        if self._ordered is None:
+            self._ordered = _sort_frequency(self._counts)
+            self._top = None
+        return self._ordered
     
-    # Calculate total characters across all words
-    total_length = sum(len(word) for word in words)
+    def __getitem__(self, word: str) -> int:
+        # Explicit check: a Counter would return 0 instead of raising
+        if word not in self._counts:
+            raise KeyError(word)
+        return self._counts[word]
     
-    # Divide by word count and round to 2 decimal places
-    # This follows standard mathematical rounding rules
-    average_word_length = round(total_length / word_count, 2)
+    def __contains__(self, word) -> bool:
+        return word in self._counts
     
+    def __len__(self) -> int:
+        return len(self._counts)
     
-    # Identify the longest word
+    def __iter__(self) -> Iterator[str]:
+        if self._ordered is None:
+            top = self._select_top()
+            for word, _ in top:
+                yield word
+            if len(top) == len(self._counts):
+                return
+            # Iteration went past the top entries: sort everything once
+            remaining = self._sort_all()[len(top):]
+        else:
+            remaining = self._ordered
+        for word, _ in remaining:
+            yield word
     
-    # Find the maximum word length
-    max_length = max(len(word) for word in words)
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.most_common(self._top_k))}, size={len(self)})"
+
+
+class TextStatistics:
+    """
+    Mergeable accumulator for the statistics returned by analyze_text().
+    
+    Holds just enough state to rebuild the analyze_text() result exactly:
+    
+    - word_count: Total number of words seen
+    - total_length: Sum of the lengths of all words (for the average)
+    - max_length / longest_words: Length of the longest word and the set of
+      distinct words having that length
+    - word_frequency: Counter of every word, array-backed VocabularyCounts
+      for long-lived aggregates, disk-spilling SpillingCounts when exact
+      counts are needed but the vocabulary does not fit in memory, a
+      fixed-size SpaceSaving summary when approximate counts are enough,
+      or None when frequencies are not needed at all
+    - distinct_words: Optional HyperLogLog estimating the vocabulary size
+    - ngrams: Optional NgramCounter of bigrams, trigrams, ... counted from
+      the same token lists as the words
+    
+    Every field combines associatively, so shards can be analyzed in
+    separate workers (or at different times) and merged afterwards instead
+    of re-analyzing the whole corpus. Each update() call is treated as a
+    separate document: words never join across two calls.
+    """
+    
+    def __init__(self, frequency: Union[str, VocabularyCounts, SpillingCounts,
+                                        SpaceSaving, None] = "exact",
+                 distinct: Union[bool, HyperLogLog] = False,
+                 ngrams: Optional[NgramCounter] = None):
+        """
+        Initialize an empty accumulator.
+        
+        Args:
+            frequency: "exact" (default) to count every word in a Counter,
+                a VocabularyCounts instance to count every word in an array
+                indexed by a (possibly shared) Vocabulary,
+                a SpillingCounts instance to count every word exactly
+                while spilling to temporary files past a memory limit,
+                a SpaceSaving instance to keep approximate counts of the most
+                frequent words in fixed memory, or None to skip word
+                frequencies entirely. word_count, average_word_length and
+                longest_words stay exact either way.
+            distinct: True (or a HyperLogLog instance, to choose its
+                precision) to estimate the number of distinct words. Memory
+                stays at a few KB however large the vocabulary grows, so
+                combined with frequency=None no per-word map outlives a
+                single chunk.
+            ngrams: An NgramCounter to also count n-grams, e.g.
+                NgramCounter((2, 3)) for bigrams and trigrams. N-grams never
+                span two documents (two update() calls).
+        
+        Raises:
+            ValueError: If frequency, distinct or ngrams has an unsupported
+                value
+        """
+        
+        if frequency == "exact":
+            frequency = Counter()
+        elif frequency is not None and not isinstance(
+                frequency, (VocabularyCounts, SpillingCounts, SpaceSaving)):
+            raise ValueError(
+                'frequency must be "exact", None, or a VocabularyCounts, '
+                'SpillingCounts or SpaceSaving instance'
+            )
+        
+        if distinct is True:
+            distinct = HyperLogLog()
+        elif distinct is False:
+            distinct = None
+        elif not isinstance(distinct, HyperLogLog):
+            raise ValueError("distinct must be a bool or a HyperLogLog instance")
+        
+        if ngrams is not None and not isinstance(ngrams, NgramCounter):
+            raise ValueError("ngrams must be None or an NgramCounter instance")
+        
+        self.word_count = 0
+        self.total_length = 0
+        self.max_length = 0
+        self.longest_words: Set[str] = set()
+        self.word_frequency: Union[Counter, VocabularyCounts, SpillingCounts,
+                                   SpaceSaving, None] = frequency
+        self.distinct_words: Optional[HyperLogLog] = distinct
+        self.ngrams: Optional[NgramCounter] = ngrams
+    
+    def empty_copy(self) -> "TextStatistics":
+        """
+        Return a new, empty accumulator with the same configuration
+        (frequency mode, sketch sizes), e.g. to hand to a worker.
+        """
+        
+        frequency = self.word_frequency
+        if isinstance(frequency, Counter):
+            frequency = "exact"
+        elif isinstance(frequency, VocabularyCounts):
+            # Sharing the vocabulary keeps IDs aligned for cheap merges
+            frequency = VocabularyCounts(frequency.vocabulary)
+        elif isinstance(frequency, SpillingCounts):
+            frequency = frequency.empty_copy()
+        elif frequency is not None:
+            frequency = SpaceSaving(frequency.capacity)
+        
+        distinct = False
+        if self.distinct_words is not None:
+            distinct = HyperLogLog(self.distinct_words.precision)
+        
+        ngrams = None if self.ngrams is None else self.ngrams.empty_copy()
+        
+        return TextStatistics(frequency, distinct, ngrams)
+    
+    @property
+    def exact(self) -> bool:
+        """Whether word frequencies are counted exactly."""
+        
+        return isinstance(self.word_frequency, (Counter, VocabularyCounts, SpillingCounts))
+    
+    def update(self, text: str) -> "TextStatistics":
+        """
+        Add the words of one document.
+        
+        Unlike analyze_text(), empty or punctuation-only input is accepted
+        here and simply contributes nothing.
+        
+        Args:
+            text (str): Document to add
+        
+        Returns:
+            TextStatistics: self, to allow chaining
+        
+        Raises:
+            TypeError: If text is not a string
+        """
+        
+        if not isinstance(text, str):
+            raise TypeError(f"Input must be a string, got {type(text).__name__} instead")
+        
+        return self.update_words(normalize(text).split())
+    
+    def update_words(self, words: Iterable[str]) -> "TextStatistics":
+        """
+        Add already cleaned words (lowercase, punctuation removed) of one
+        document, in order.
+        
+        Args:
+            words: Iterable of cleaned words
+        
+        Returns:
+            TextStatistics: self, to allow chaining
+        """
+        
+        if self.ngrams is None:
+            return self.update_counts(Counter(words))
+        
+        words = words if isinstance(words, list) else list(words)
+        self.update_counts(Counter(words))
+        self.ngrams.update(words)
+        return self
+    
+    def _update_batch(self, words: List[str], context: Tuple[str, ...]) -> Tuple[str, ...]:
+        """
+        Add one batch of a document read in several batches. Returns the
+        n-gram context to pass along with the next batch.
+        """
+        
+        self.update_counts(Counter(words))
+        if self.ngrams is not None:
+            context = self.ngrams.update(words, context)
+        return context
+    
+    def update_counts(self, counts: Mapping[str, int]) -> "TextStatistics":
+        """
+        Add a word -> count mapping of cleaned words.
+        
+        Working from the counts means the length statistics cost one step
+        per distinct word instead of one step per occurrence.
+        
+        Args:
+            counts: Mapping of cleaned words to their number of occurrences
+        
+        Returns:
+            TextStatistics: self, to allow chaining
+        """
+        
+        total_length = 0
+        max_length = self.max_length
+        longest_words = self.longest_words
+        
+        for word, count in counts.items():
+            length = len(word)
+            total_length += length * count
+            if length > max_length:
+                max_length = length
+                longest_words = {word}
+            elif length == max_length:
+                longest_words.add(word)
+        
+        self.word_count += sum(counts.values())
+        self.total_length += total_length
+        self.max_length = max_length
+        self.longest_words = longest_words
+        if self.word_frequency is not None:
+            self.word_frequency.update(counts)
+        if self.distinct_words is not None:
+            self.distinct_words.update(counts.keys())
+        return self
+    
+    def update_stream(self, source, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      encoding: str = 'utf-8') -> "TextStatistics":
+        """
+        Add one document read chunk by chunk from a path, file object or
+        iterable of str/bytes chunks (see analyze_stream()).
+        
+        Returns:
+            TextStatistics: self, to allow chaining
+        
+        Raises:
+            TypeError: If source or one of its chunks has an unsupported type
+            ValueError: If chunk_size is not positive
+        """
+        
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be greater than 0")
+        
+        # Only one chunk of text is alive at a time; the accumulator is the
+        # only structure that outlives it
+        context = ()
+        for words in _iter_word_batches(_iter_text_chunks(source, chunk_size, encoding)):
+            context = self._update_batch(words, context)
+        return self
+    
+    def update_file(self, path, encoding: str = 'utf-8',
+                    window_size: int = DEFAULT_WINDOW_SIZE) -> "TextStatistics":
+        """
+        Add one document read from a file through mmap, or decompressed on
+        the fly if it is a gzip, bz2 or xz file (see analyze_file()).
+        
+        Returns:
+            TextStatistics: self, to allow chaining
+        
+        Raises:
+            ValueError: If window_size is not positive
+        """
+        
+        if window_size <= 0:
+            raise ValueError("window_size must be greater than 0")
+        
+        compression = detect_compression(path)
+        if compression is not None:
+            return self._update_compressed(path, compression, encoding, window_size)
+        
+        # Multi-byte encodings such as UTF-16 cannot be cut at ASCII bytes
+        if codecs.lookup(encoding).name not in _ASCII_COMPATIBLE_ENCODINGS:
+            return self.update_stream(path, encoding=encoding)
+        
+        with open(path, 'rb') as handle:
+            if os.fstat(handle.fileno()).st_size == 0:
+                return self
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                size = len(mapped)
+                start = 0
+                context = ()
+                while start < size:
+                    # Cut the window at the next whitespace byte, which is
+                    # always a character boundary in these encodings
+                    match = _BYTES_WHITESPACE.search(mapped, min(start + window_size, size))
+                    end = match.start() + 1 if match else size
+                    context = self._update_window(mapped[start:end], encoding, context)
+                    start = end
+        return self
+    
+    def _update_compressed(self, path, compression: str, encoding: str,
+                           window_size: int) -> "TextStatistics":
+        """
+        Add one compressed document, decompressed window by window by a
+        reader thread while the previous window is being analyzed.
+        """
+        
+        blocks = iter_decompressed(path, window_size, compression)
+        if codecs.lookup(encoding).name not in _ASCII_COMPATIBLE_ENCODINGS:
+            return self.update_stream(blocks, encoding=encoding)
+        
+        # Same whitespace-cut windows as the mmap path; the partial word at
+        # the end of a block is carried over into the next one, in pieces
+        # joined only once it ends (see _cut_at_whitespace())
+        carry = []
+        context = ()
+        for block in blocks:
+            window = block.rstrip(_BYTES_NON_WHITESPACE)
+            tail = block[len(window):]
+            if window:
+                if carry:
+                    carry.append(window)
+                    window = b''.join(carry)
+                    carry = []
+                context = self._update_window(window, encoding, context)
+            if tail:
+                carry.append(tail)
+        if carry:
+            self._update_window(b''.join(carry), encoding, context)
+        return self
+    
+    def _update_window(self, window: bytes, encoding: str,
+                       context: Tuple[str, ...] = ()) -> Tuple[str, ...]:
+        """
+        Add a window of encoded text that starts and ends at whitespace.
+        Returns the n-gram context for the next window of the file.
+        """
+        
+        if not window.isascii():
+            return self._update_batch(normalize(window.decode(encoding)).split(), context)
+        
+        # Fast path: lowercase and strip the raw bytes in one translate()
+        cleaned = window.translate(_BYTES_TABLE, _BYTES_PUNCTUATION)
+        if self.ngrams is not None:
+            # N-grams need every token in order, not just the distinct ones
+            return self._update_batch(cleaned.decode('ascii').split(), context)
+        
+        # Otherwise split the bytes and decode only the distinct words
+        counts = Counter(cleaned.split())
+        self.update_counts({
+            word.decode('ascii'): count for word, count in counts.items()
+        })
+        return context
+    
+    def merge(self, other: "TextStatistics") -> "TextStatistics":
+        """
+        Fold another accumulator into this one.
+        
+        The result is the same as if every document added to other had been
+        added to self. other is left unchanged.
+        
+        Args:
+            other (TextStatistics): Accumulator to merge in
+        
+        Returns:
+            TextStatistics: self, to allow chaining
+        """
+        
+        if not isinstance(other, TextStatistics):
+            raise TypeError(
+                f"Can only merge TextStatistics, got {type(other).__name__} instead"
+            )
+        if type(self.word_frequency) is not type(other.word_frequency):
+            raise TypeError("Cannot merge accumulators with different frequency modes")
+        if (self.distinct_words is None) != (other.distinct_words is None):
+            raise TypeError("Cannot merge accumulators with and without distinct_words")
+        if (self.ngrams is None) != (other.ngrams is None):
+            raise TypeError("Cannot merge accumulators with and without ngrams")
+        
+        self.word_count += other.word_count
+        self.total_length += other.total_length
+        if other.max_length > self.max_length:
+            self.max_length = other.max_length
+            self.longest_words = set(other.longest_words)
+        elif other.max_length == self.max_length:
+            self.longest_words |= other.longest_words
+        if isinstance(self.word_frequency, Counter):
+            self.word_frequency.update(other.word_frequency)
+        elif self.word_frequency is not None:
+            self.word_frequency.merge(other.word_frequency)
+        if self.distinct_words is not None:
+            self.distinct_words.merge(other.distinct_words)
+        if self.ngrams is not None:
+            self.ngrams.merge(other.ngrams)
+        return self
+    
+    def subtract(self, other: "TextStatistics") -> "TextStatistics":
+        """
+        Remove previously merged documents from this accumulator.
+        
+        Lets a corpus total be refreshed when one document changes: subtract
+        the old document's statistics and merge the new ones, instead of
+        re-analyzing everything.
+        
+        Args:
+            other (TextStatistics): Accumulator whose documents were
+                previously added to self
+        
+        Returns:
+            TextStatistics: self, to allow chaining
+        
+        Raises:
+            TypeError: If either side does not count words in a Counter or
+                tracks distinct_words or ngrams
+            ValueError: If other holds words that self does not
+        """
+        
+        if not (isinstance(self.word_frequency, Counter)
+                and isinstance(other.word_frequency, Counter)):
+            raise TypeError("subtract() requires Counter word frequencies")
+        if self.distinct_words is not None:
+            raise TypeError("subtract() is not supported with distinct_words")
+        if self.ngrams is not None or other.ngrams is not None:
+            raise TypeError("subtract() is not supported with ngrams")
+        
+        frequency = self.word_frequency
+        for word, count in other.word_frequency.items():
+            if frequency.get(word, 0) < count:
+                raise ValueError(f"Cannot subtract {count} x {word!r}: not present")
+        
+        for word, count in other.word_frequency.items():
+            remaining = frequency[word] - count
+            if remaining:
+                frequency[word] = remaining
+            else:
+                del frequency[word]
+        
+        self.word_count -= other.word_count
+        self.total_length -= other.total_length
+        
+        # The longest words may have disappeared, in which case the new
+        # maximum has to be recovered from the remaining vocabulary
+        self.longest_words = {word for word in self.longest_words if word in frequency}
+        if not self.longest_words:
+            self.max_length = max(map(len, frequency), default=0)
+            self.longest_words = {
+                word for word in frequency if len(word) == self.max_length
+            }
+        return self
+    
+    def finalize(self, top_k: Optional[int] = None) -> dict:
+        """
+        Build the result dictionary, identical to analyze_text() output.
+        
+        The accumulator is not modified and can keep receiving updates.
+        
+        Args:
+            top_k (int): Return word_frequency as a FrequencyView over a
+                snapshot of the counts, with the first top_k entries selected
+                by a heap (see analyze_text())
+        
+        Returns:
+            dict: word_count, average_word_length, longest_words and
+                word_frequency (sorted by descending count, then word).
+                With approximate frequencies, word_frequency holds the
+                estimated counts of the monitored words (at most top_k of
+                them) and an extra word_frequency_error key maps each of
+                them to its maximum overestimation. With SpillingCounts,
+                word_frequency is a SpilledFrequency streaming the same
+                order from disk. Without frequencies,
+                word_frequency is left out. When distinct words are tracked,
+                distinct_words holds the estimate and distinct_words_error
+                its relative standard error. When n-grams are counted,
+                bigram_frequency, trigram_frequency, ... follow the same
+                rules as word_frequency (including the _error keys with a
+                capacity).
+        
+        Raises:
+            ValueError: If no words have been added
+        """
+        
+        if not self.word_count:
+            raise ValueError("No valid words found after removing punctuation")
+        
+        result = {
+            "word_count": self.word_count,
+            "average_word_length": round(self.total_length / self.word_count, 2),
+            "longest_words": sorted(self.longest_words)
+        }
+        
+        if self.word_frequency is not None:
+            _add_frequency(result, "word_frequency", self.word_frequency, top_k)
+        
+        if self.distinct_words is not None:
+            result["distinct_words"] = self.distinct_words.estimate()
+            result["distinct_words_error"] = round(self.distinct_words.error_rate, 4)
+        
+        if self.ngrams is not None:
+            _add_ngram_frequencies(result, self.ngrams, top_k)
+        
+        return result
+
+
+def _add_ngram_frequencies(result, ngrams, top_k):
+    """Stores the frequencies of every n-gram order in a result."""
+    
+    for n, counts in ngrams.counts.items():
+        _add_frequency(result, f"{ngram_name(n)}_frequency", counts, top_k)
+
+
+def _add_frequency(result, key, frequency, top_k):
+    """
+    Stores a frequency table in a result under key: exact counts sorted by
+    (-count, word) or as a FrequencyView, spilled counts as a streaming
+    SpilledFrequency, SpaceSaving estimates with their error bounds under
+    key + "_error".
+    """
+    
+    if isinstance(frequency, SpillingCounts):
+        result[key] = SpilledFrequency(frequency.snapshot())
+    elif isinstance(frequency, SpaceSaving):
+        top = frequency.top(top_k)
+        result[key] = {word: count for word, count, _ in top}
+        result[f"{key}_error"] = {word: error for word, _, error in top}
+    else:
+        result[key] = (
+            dict(_sort_frequency(frequency)) if top_k is None
+            else FrequencyView(dict(frequency.items()), top_k)
+        )
+
+
+def analyze_stream(source, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8', state=None,
+                   top_k=None, fields=None):
+    """
+    Analyzes a text stream chunk by chunk with bounded memory.
     
-    # Create list of all words matching maximum length
-    # Using set() to remove duplicates (if "hello" appears twice and is longest)
-    # Then convert back to list and sort alphabetically for consistent output
-    longest_words = sorted(list(set(
-        [word for word in words if len(word) == max_length]
-    )))
+    Produces exactly the same dictionary as analyze_text() would for the
+    concatenated input, but never holds more than one chunk of text at a
+    time. Peak memory depends on the vocabulary size, not the input size.
     
+    Args:
+        source: A file path (str or os.PathLike), a file object opened in
+            text or binary mode, or an iterable of str/bytes chunks.
+        chunk_size (int): Number of characters (or bytes) read per chunk
+            when source is a path or file object.
+        encoding (str): Encoding used for paths and bytes chunks.
+        state (TextStatistics): Optional accumulator to add the stream to,
+            e.g. to combine several streams. A new one is used by default.
+        top_k (int): See analyze_text()
+        fields: See analyze_text(). Without word_frequency no Counter is
+            kept at all (unless an explicit state is given).
     
-    # Word frequency calculation
+    Returns:
+        dict: Same keys as analyze_text() - word_count, average_word_length,
+            longest_words and word_frequency
     
-    # Use Counter from collections module for efficient frequency counting
-    # Counter is optimized for exactly this task and provides O(n) performance
-    word_frequency = dict(Counter(words))
+    Raises:
+        TypeError: If source or one of its chunks has an unsupported type
+        ValueError: If chunk_size is not positive or no valid words are found
+    """
     
-    # Sort the frequency dictionary for better readability
-    # Primary sort: by frequency in descending order (most common first)
-    # Secondary sort: alphabetically for consistent ordering within same frequency
-    # The lambda function returns a tuple: (-frequency, word)
-    # Negative frequency ensures descending order
-    word_frequency = dict(sorted(
-        word_frequency.items(),
-        key=lambda x: (-x[1], x[0])
-    ))
+    if fields is not None:
+        fields = _check_fields(fields)
+    if state is None:
+        state = _state_for_fields(fields)
     
+    result = state.update_stream(source, chunk_size, encoding).finalize(top_k)
+    return _select_fields(result, fields)
+
+
+def analyze_file(path, encoding='utf-8', window_size=DEFAULT_WINDOW_SIZE, top_k=None,
+                 fields=None):
+    """
+    Analyzes a file through a memory mapping instead of a Python str.
+    
+    The file is processed in windows of about window_size bytes, cut at
+    whitespace. Pure-ASCII windows are lowercased, stripped of punctuation
+    and split directly on the bytes with one translate() call, skipping the
+    decode/lower/translate/split copies of analyze_text(); only the distinct
+    words are ever decoded. Windows containing other characters are decoded
+    and go through the regular str pipeline, so the result is always
+    identical to analyze_text() on the decoded file.
     
-    # Result 
+    The bytes fast path applies to ASCII, UTF-8, Latin-1 and cp1252 files.
+    Other encodings fall back to analyze_stream().
+    
+    gzip, bz2 and xz files (recognized by their magic bytes) are decompressed
+    on the fly instead of being mapped: a reader thread decompresses the
+    next window while the current one is analyzed, and only a few windows
+    are ever held in memory.
+    
+    Args:
+        path: Path of the file to analyze
+        encoding (str): Encoding of the file
+        window_size (int): Approximate number of bytes processed at a time
+        top_k (int): See analyze_text()
+        fields: See analyze_text()
+    
+    Returns:
+        dict: Same keys as analyze_text()
+    
+    Raises:
+        ValueError: If window_size is not positive, the file cannot be
+            decoded, or it contains no valid words
+    """
+    
+    if fields is not None:
+        fields = _check_fields(fields)
+    
+    state = _state_for_fields(fields).update_file(path, encoding, window_size)
+    return _select_fields(state.finalize(top_k), fields)
+
+
+def _split_at_whitespace(text, parts):
+    """
+    Cuts text into at most `parts` pieces of roughly equal size.
+    
+    Every cut is placed on a whitespace character, so no word is ever split
+    between two pieces and each word ends up in exactly one of them.
+    """
+    
+    pieces = []
+    target = -(-len(text) // parts)
+    start = 0
+    while start < len(text):
+        # Move the nominal cut point forward to the next whitespace
+        match = _WHITESPACE.search(text, start + target)
+        end = match.start() if match else len(text)
+        pieces.append(text[start:end])
+        start = end
+    return pieces
+
+
+def _analyze_piece(text, frequency="exact"):
+    """Worker task: analyze one piece of a document into an accumulator."""
+    
+    return TextStatistics(frequency).update(text)
+
+
+def _analyze_text_parallel(text, workers=None, top_k=None, fields=None):
+    """
+    Parallel mode of analyze_text(): analyze whitespace-aligned pieces of
+    the text in worker processes and merge the partial accumulators.
+    """
+    
+    workers = workers or os.cpu_count() or 1
+    pieces = _split_at_whitespace(text, workers)
+    
+    # Workers skip the Counter when word frequencies were not requested
+    state = _state_for_fields(fields)
+    frequency = "exact" if state.exact else None
+    with ProcessPoolExecutor(max_workers=min(workers, len(pieces))) as executor:
+        for partial in executor.map(_analyze_piece, pieces, [frequency] * len(pieces)):
+            state.merge(partial)
+    
+    return _select_fields(state.finalize(top_k), fields)
+
+
+def analyze_many(texts, columnar=False, skip_invalid=False, top_k=None, fields=None,
+                 ngrams=None):
+    """
+    Analyzes many short documents (tweets, chat messages...) in one call.
+    
+    A convenience wrapper: every document goes through analyze_text(), so
+    the per-document results are exactly the same and cost the same as a
+    loop over analyze_text(). Options are validated once, documents are
+    reported by position when they are rejected, and the results can be
+    returned in columns.
+    
+    Args:
+        texts: Iterable of documents (str)
+        columnar (bool): Return one list per statistic instead of one dict
+            per document. In this form each *_frequency entry is a list of
+            (word, count) pairs in sorted order (only the top_k ones with
+            top_k).
+        skip_invalid (bool): Produce None for documents analyze_text() would
+            reject (wrong type, blank, punctuation only) instead of raising
+        top_k (int): See analyze_text()
+        fields: See analyze_text()
+        ngrams: See analyze_text(). An NgramCounter is only used as a
+            template: every document gets an empty copy of it.
+    
+    Returns:
+        list or dict: A list of analyze_text() result dicts, or with
+            columnar=True a dict mapping each key of those results to a list
+            with one entry per document
+    
+    Raises:
+        TypeError: If a document is not a string (unless skip_invalid)
+        ValueError: If a document has no valid words (unless skip_invalid),
+            or fields or ngrams is invalid
+    """
+    
+    # Invalid options fail here, not as an error of every document
+    if fields is not None:
+        fields = _check_fields(fields)
+    if ngrams is not None and not isinstance(ngrams, NgramCounter):
+        ngrams = NgramCounter(ngrams)
+    
+    rows = []
+    for index, text in enumerate(texts):
+        try:
+            rows.append(analyze_text(
+                text, top_k=top_k, fields=fields,
+                ngrams=ngrams.empty_copy() if ngrams is not None else None
+            ))
+        except (TypeError, ValueError) as e:
+            if not skip_invalid:
+                raise type(e)(f"Document {index}: {e}") from None
+            rows.append(None)
+    
+    if not columnar:
+        return rows
+    
+    keys = dict.fromkeys(fields if fields is not None else ANALYSIS_FIELDS)
+    for row in rows:
+        if row is not None:
+            keys.update(dict.fromkeys(row))
+    columns = {}
+    for key in keys:
+        column = [None if row is None else row.get(key) for row in rows]
+        if key.endswith("_frequency"):
+            # A FrequencyView heap-selects its top_k entries
+            column = [
+                frequency.most_common(top_k) if isinstance(frequency, FrequencyView)
+                else None if frequency is None
+                else list(frequency.items())
+                for frequency in column
+            ]
+        columns[key] = column
+    return columns
+
+
+def _copy_result(result):
+    """Returns a copy of a result dict that shares no mutable parts with it."""
     
     return {
-        "word_count": word_count,
-        "average_word_length": average_word_length,
-        "longest_words": longest_words,
-        "word_frequency": word_frequency
+        **result,
+        "longest_words": list(result["longest_words"]),
+        "word_frequency": dict(result["word_frequency"])
     }
 
 
+class AnalysisCache:
+    """
+    A thread-safe LRU cache of analyze_text() results keyed by content hash.
+    
+    Pipelines that see the same bodies over and over (templated emails,
+    retweets, boilerplate) pay for the analysis once per distinct text.
+    
+    Key Features:
+    - Keys are 128-bit BLAKE2b digests of the UTF-8 text, so the cache never
+      holds on to the analyzed strings themselves
+    - Bounded size with least-recently-used eviction
+    - Every lookup returns a fresh copy, so callers cannot corrupt entries
+    - Hit/miss/eviction counters for monitoring
+    
+    The analysis itself runs outside the lock, so concurrent misses never
+    wait on each other (two threads missing on the same text may both
+    compute it; the result is identical either way).
+    """
+    
+    def __init__(self, max_size: int = 10000):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_size (int): Maximum number of results kept
+        
+        Raises:
+            ValueError: If max_size <= 0
+        """
+        
+        if max_size <= 0:
+            raise ValueError("max_size must be greater than 0")
+        
+        self.max_size = max_size
+        
+        # Structure: {digest: result}, least recently used first
+        self.entries: OrderedDict = OrderedDict()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        # Protects entries and the counters
+        self.lock = Lock()
+    
+    @staticmethod
+    def _key(text: str) -> bytes:
+        # surrogatepass keeps lone surrogates (valid in str) hashable
+        return hashlib.blake2b(
+            text.encode('utf-8', 'surrogatepass'), digest_size=16
+        ).digest()
+    
+    def analyze(self, text: str) -> dict:
+        """
+        Return analyze_text(text), computing it only on a cache miss.
+        
+        Invalid input raises exactly like analyze_text() and is not cached.
+        
+        Args:
+            text (str): The input text to analyze
+        
+        Returns:
+            dict: A private copy of the analyze_text() result
+        """
+        
+        if not isinstance(text, str):
+            raise TypeError(f"Input must be a string, got {type(text).__name__} instead")
+        
+        key = self._key(text)
+        
+        with self.lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return _copy_result(result)
+            self.misses += 1
+        
+        result = analyze_text(text)
+        
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        
+        return _copy_result(result)
+    
+    def get_stats(self) -> dict:
+        """
+        Get cache statistics.
+        
+        Returns:
+            dict: Statistics dictionary with keys:
+                - size: Number of cached results
+                - max_size: Capacity of the cache
+                - hits / misses / evictions: Counters since creation or
+                  the last clear()
+                - hit_rate: hits / (hits + misses), 0.0 before any lookup
+        """
+        
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+    
+    def clear(self) -> None:
+        """Drop every cached result and reset the counters."""
+        
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+class StageProfiler:
+    """
+    A thread-safe registry of per-stage analyze_text() timings.
+    
+    Install it as the stage hook (see set_stage_hook()), either for good or
+    around a block of code:
+    
+        with StageProfiler(trace_memory=True) as profiler:
+            analyze_text(text)
+        profiler.get_stats()["tokenization"]["total_seconds"]
+    
+    Key Features:
+    - Calls, total and maximum time per stage, to spot the costly stage
+    - Total and maximum allocated bytes per stage when tracemalloc traces
+    - The input length of the slowest call of every stage, to find
+      pathological input shapes
+    
+    trace_memory starts tracemalloc for the duration of the with block,
+    which slows every allocation in the process down; leave it off in
+    production and use it to investigate.
+    """
+    
+    def __init__(self, trace_memory: bool = False):
+        """
+        Initialize an empty registry.
+        
+        Args:
+            trace_memory (bool): Start tracemalloc while used as a context
+                manager, so allocated bytes are recorded
+        """
+        
+        self.trace_memory = trace_memory
+        
+        # Structure: {stage: {"calls", "total_seconds", "max_seconds",
+        #                     "slowest_text_length", "total_allocated_bytes",
+        #                     "max_allocated_bytes"}}
+        self.stages: Dict[str, dict] = {}
+        
+        # Protects stages
+        self.lock = Lock()
+        
+        self._previous_hook = None
+        self._started_tracing = False
+    
+    def __call__(self, stage: str, seconds: float, allocated: Optional[int],
+                 text_length: Optional[int] = None) -> None:
+        """Record one stage (the hook interface)."""
+        
+        with self.lock:
+            record = self.stages.get(stage)
+            if record is None:
+                record = self.stages[stage] = {
+                    "calls": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                    "slowest_text_length": None,
+                    "total_allocated_bytes": 0,
+                    "max_allocated_bytes": 0
+                }
+            record["calls"] += 1
+            record["total_seconds"] += seconds
+            if seconds > record["max_seconds"]:
+                record["max_seconds"] = seconds
+                record["slowest_text_length"] = text_length
+            if allocated is not None:
+                record["total_allocated_bytes"] += allocated
+                if allocated > record["max_allocated_bytes"]:
+                    record["max_allocated_bytes"] = allocated
+    
+    def get_stats(self) -> Dict[str, dict]:
+        """
+        Get the recorded statistics.
+        
+        Returns:
+            dict: {stage: {"calls", "total_seconds", "max_seconds",
+                "mean_seconds", "slowest_text_length",
+                "total_allocated_bytes", "max_allocated_bytes"}}, in the
+                order stages were first seen
+        """
+        
+        with self.lock:
+            return {
+                stage: dict(record, mean_seconds=record["total_seconds"] / record["calls"])
+                for stage, record in self.stages.items()
+            }
+    
+    def reset(self) -> None:
+        """Forget every recorded stage."""
+        
+        with self.lock:
+            self.stages.clear()
+    
+    def __enter__(self) -> "StageProfiler":
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._previous_hook = set_stage_hook(self)
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        set_stage_hook(self._previous_hook)
+        self._previous_hook = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
 # Example usage
 
-if __name__ == "__main__":
+def run_examples():
+    """Print examples of the Python API (python -m smart_text_analyzer --examples)."""
     
     # Example 1: Basic usage
     print("Example 1: Basic Usage")
@@ -139,7 +1546,8 @@ if __name__ == "__main__":
     result2 = analyze_text(text2)
     print(f"Input: {text2}")
     print(f"Word count: {result2['word_count']}")
-    print(f"Most frequent word: {list(result2['word_frequency'].keys())[0]}")
+    top = analyze_text(text2, top_k=1)["word_frequency"].most_common(1)
+    print(f"Most frequent word: {top[0][0]}")
     print()
     
     # Example 3: Error handling - empty input
@@ -167,3 +1575,21 @@ if __name__ == "__main__":
         analyze_text("!@#$%^&*()")
     except ValueError as e:
         print(f"Caught error: {e}")
+    print()
+    
+    # Example 6: Streaming analysis over chunks
+    print("Example 6: Streaming Analysis")
+    print("-" * 50)
+    chunks = ["The quick bro", "wn fox jumps over the la", "zy dog the fox"]
+    result6 = analyze_stream(chunks)
+    print(f"Chunks: {chunks}")
+    print(f"Matches analyze_text: {result6 == result1}")
+
+
+# Command-line interface: python -m smart_text_analyzer --help
+
+if __name__ == "__main__":
+    import sys
+    from corpus_analyzer import main
+    
+    sys.exit(main())
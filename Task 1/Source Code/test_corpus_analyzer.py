@@ -0,0 +1,245 @@
+"""
+Tests for the corpus_analyzer command-line interface.
+
+Run with: python -m unittest test_corpus_analyzer (or pytest)
+"""
+
+import io
+import os
+import sys
+import json
+import signal
+import tempfile
+import unittest
+import contextlib
+import subprocess
+from unittest import mock
+
+import corpus_analyzer
+from corpus_analyzer import _analyze_shard, analyze_corpus, iter_corpus_paths, main
+from serialization import loads_statistics
+from smart_text_analyzer import TextStatistics, analyze_file
+
+
+class CorpusTestCase(unittest.TestCase):
+    """Three small documents in a temporary directory."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = []
+        for index, text in enumerate([
+            "apple banana apple cherry banana apple date elder fig grape",
+            "kiwi lemon kiwi mango kiwi lemon nut olive pear quince",
+            "red red blue green blue red yellow white black orange"
+        ]):
+            path = os.path.join(self.directory.name, f"doc{index}.txt")
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write(text)
+            self.paths.append(path)
+        self.output = os.path.join(self.directory.name, "out.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_cli(self, *args):
+        status = main([*self.paths, "-w", "1", "-q", "-o", self.output, *args])
+        self.assertEqual(status, 0)
+        with open(self.output, encoding='utf-8') as handle:
+            return [json.loads(line) for line in handle]
+
+
+class TopOutputTest(CorpusTestCase):
+    """--top must limit every frequency table, including per-file results."""
+
+    def test_per_file_results_are_limited(self):
+        for output in ("files", "both"):
+            with self.subTest(output=output):
+                records = self.run_cli("--output", output, "--top", "2")
+                for record in records:
+                    frequency = record["result"]["word_frequency"]
+                    self.assertEqual(len(frequency), 2)
+                    if record["path"] is not None:
+                        expected = analyze_file(record["path"])["word_frequency"]
+                        self.assertEqual(list(frequency.items()),
+                                         list(expected.items())[:2])
+
+    def test_ngram_tables_are_limited(self):
+        records = self.run_cli("--output", "files", "--ngrams", "2", "--top", "1")
+        for record in records:
+            self.assertEqual(len(record["result"]["bigram_frequency"]), 1)
+
+
+class UnreadableFileTest(CorpusTestCase):
+    """A file that cannot be decoded is reported and skipped, not fatal."""
+
+    def setUp(self):
+        super().setUp()
+        self.bad_path = os.path.join(self.directory.name, "latin1.txt")
+        with open(self.bad_path, 'wb') as handle:
+            handle.write("caf\u00e9 cr\u00e8me".encode('latin-1'))
+        self.good_paths = list(self.paths)
+        self.paths.insert(1, self.bad_path)
+
+    def expected_total(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            return analyze_corpus(self.good_paths, workers=1)["result"]
+
+    def test_per_file_output_reports_error(self):
+        records = self.run_cli("--output", "both")
+        by_path = {record["path"]: record for record in records}
+        self.assertEqual(set(by_path), {*self.good_paths, self.bad_path, None})
+        self.assertIn("utf-8", by_path[self.bad_path]["error"])
+        self.assertNotIn("result", by_path[self.bad_path])
+        total = by_path[None]
+        self.assertEqual(total["files"], len(self.good_paths))
+        self.assertEqual(total["result"], json.loads(json.dumps(self.expected_total())))
+
+    def test_total_output_warns(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            status = main([*self.paths, "-w", "1", "-q", "-o", self.output])
+        self.assertEqual(status, 0)
+        with open(self.output, encoding='utf-8') as handle:
+            total = json.load(handle)
+        self.assertIn(self.bad_path, stderr.getvalue())
+        self.assertEqual(total, json.loads(json.dumps(self.expected_total())))
+
+    def test_shard_is_rebuilt_without_failed_file(self):
+        for per_file in (False, True):
+            with self.subTest(per_file=per_file):
+                packed, _, files, _, failures = _analyze_shard(
+                    self.paths, 'utf-8', 4, TextStatistics(), per_file=per_file
+                )
+                self.assertEqual(files, len(self.good_paths))
+                self.assertEqual([record["path"] for record in failures], [self.bad_path])
+                self.assertEqual(loads_statistics(packed).finalize(),
+                                 analyze_corpus(self.good_paths, workers=1)["result"])
+
+
+class IterCorpusPathsTest(unittest.TestCase):
+    """Directories are walked like os.walk(), streaming the large ones."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        for relative in ("b.txt", "a.txt", "sub/z.txt", "sub/y.txt", "sub/deeper/x.txt",
+                         "other/w.txt"):
+            path = os.path.join(self.root, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write("text")
+        if hasattr(os, "symlink"):
+            os.symlink(os.path.join(self.root, "sub"), os.path.join(self.root, "link"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def walk(self):
+        for root, dirs, files in os.walk(self.root):
+            dirs.sort()
+            for name in sorted(files):
+                yield os.path.join(root, name)
+
+    def test_small_directories_are_sorted(self):
+        self.assertEqual(list(iter_corpus_paths([self.root])), list(self.walk()))
+
+    def test_large_directories_are_streamed(self):
+        with mock.patch.object(corpus_analyzer, "SORTED_DIRECTORY_LIMIT", 2):
+            paths = list(iter_corpus_paths([self.root]))
+        self.assertEqual(sorted(paths), sorted(self.walk()))
+
+
+# Runs the CLI and kills it (no cleanup, no final checkpoint) once a given
+# number of per-file records has been written
+_CRASHING_RUN = """
+import os, sys, signal
+import corpus_analyzer
+
+written = 0
+load_record = corpus_analyzer._load_record
+
+def crashing_load_record(record):
+    global written
+    written += 1
+    if written > int(sys.argv[1]):
+        os.kill(os.getpid(), signal.SIGKILL)
+    return load_record(record)
+
+corpus_analyzer._load_record = crashing_load_record
+corpus_analyzer.main(sys.argv[2:])
+"""
+
+
+@unittest.skipUnless(hasattr(signal, "SIGKILL"), "needs SIGKILL")
+class CheckpointResumeTest(CorpusTestCase):
+    """A run killed at any point and resumed writes every record once."""
+
+    def setUp(self):
+        super().setUp()
+        for index in range(3, 40):
+            path = os.path.join(self.directory.name, f"doc{index}.txt")
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write(f"word{index % 7} shared word{index % 5} text{index}")
+            self.paths.append(path)
+        self.checkpoint = os.path.join(self.directory.name, "run.checkpoint")
+
+    def arguments(self, *extra):
+        return [*self.paths, "-w", "1", "-q", "--files-per-shard", "2",
+                "-o", self.output, "--checkpoint", self.checkpoint,
+                "--checkpoint-interval", "0", *extra]
+
+    def crash(self, records, *extra):
+        source = os.path.dirname(os.path.abspath(__file__))
+        process = subprocess.run(
+            [sys.executable, "-c", _CRASHING_RUN, str(records), *self.arguments(*extra)],
+            cwd=source, env={**os.environ, "PYTHONPATH": source},
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        self.assertEqual(process.returncode, -signal.SIGKILL)
+        self.assertTrue(os.path.exists(self.checkpoint))
+
+    def test_no_duplicate_records(self):
+        # At most two shards (4 records) complete before the first checkpoint
+        for records in (5, 9, 30):
+            with self.subTest(records=records):
+                self.crash(records, "--output", "both")
+                self.assertEqual(main(self.arguments("--output", "both")), 0)
+                self.assertFalse(os.path.exists(self.checkpoint))
+
+                with open(self.output, encoding='utf-8') as handle:
+                    lines = [json.loads(line) for line in handle]
+                self.assertEqual(sorted(line["path"] for line in lines[:-1]),
+                                 sorted(self.paths))
+                with contextlib.redirect_stderr(io.StringIO()):
+                    expected = analyze_corpus(self.paths, workers=1)["result"]
+                self.assertEqual(lines[-1]["result"], json.loads(json.dumps(expected)))
+
+    def resume_error(self, arguments):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertEqual(main(arguments), 1)
+        self.assertTrue(os.path.exists(self.checkpoint))
+        return stderr.getvalue()
+
+    def test_changed_options_are_rejected(self):
+        self.crash(9, "--output", "both", "--distinct")
+        for extra in ((), ("--heavy-hitters", "5"), ("--encoding", "latin-1"), ("--top", "1")):
+            with self.subTest(options=extra):
+                error = self.resume_error(self.arguments("--output", "both", "--distinct", *extra)
+                                          if extra else self.arguments("--output", "both"))
+                self.assertIn("different", error)
+
+    def test_changed_inputs_are_rejected(self):
+        self.crash(30, "--output", "files")
+        inserted = os.path.join(self.directory.name, "inserted.txt")
+        with open(inserted, 'w', encoding='utf-8') as handle:
+            handle.write("new words")
+        self.paths.insert(5, inserted)
+        self.assertIn("changed", self.resume_error(self.arguments("--output", "files")))
+
+        del self.paths[5:]
+        self.assertIn("checkpoint covers", self.resume_error(self.arguments("--output", "files")))
+
+
+if __name__ == "__main__":
+    unittest.main()
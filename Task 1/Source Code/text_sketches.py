@@ -0,0 +1,260 @@
+"""
+Fixed-memory summaries used by TextStatistics when exact structures
+would not fit in memory.
+"""
+
+import math
+import heapq
+import hashlib
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+
+class SpaceSaving:
+    """
+    Approximate word frequencies in fixed memory (the Space-Saving algorithm).
+
+    At most `capacity` words are monitored. A word that is not monitored
+    replaces the monitored word with the smallest count and inherits that
+    count as its possible overestimation (its error).
+
+    Guarantees, with N the total number of words added:
+    - Every estimate is an upper bound: true <= estimate <= true + error
+    - error <= N / capacity for every monitored word
+    - Every word whose true count exceeds N / capacity is monitored
+
+    Design Rationale (Space-Saving chosen over Count-Min Sketch + heap):
+    - Reports the heavy hitters directly, no separate candidate heap needed
+    - Gives a per-word error bound instead of a probabilistic one
+    - Deterministic and mergeable across shards
+    """
+
+    def __init__(self, capacity: int = 10000):
+        """
+        Initialize an empty summary.
+
+        Args:
+            capacity (int): Maximum number of monitored words
+
+        Raises:
+            ValueError: If capacity <= 0
+        """
+
+        if capacity <= 0:
+            raise ValueError("capacity must be greater than 0")
+
+        self.capacity = capacity
+
+        # Structure: {word: estimated_count} and {word: max_overestimation}
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    @property
+    def floor(self) -> int:
+        """Upper bound on the true count of any word that is not monitored."""
+
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def update(self, counts: Mapping[str, int]) -> "SpaceSaving":
+        """
+        Add a batch of word -> count occurrences.
+
+        Args:
+            counts: Mapping of words to their number of occurrences
+
+        Returns:
+            SpaceSaving: self, to allow chaining
+        """
+
+        monitored = self.counts
+        errors = self.errors
+        new_words: List[Tuple[str, int]] = []
+
+        # Monitored words just get their counts increased
+        for word, count in counts.items():
+            if word in monitored:
+                monitored[word] += count
+            else:
+                new_words.append((word, count))
+
+        # Free slots are filled without any eviction
+        free = self.capacity - len(monitored)
+        for word, count in new_words[:free]:
+            monitored[word] = count
+            errors[word] = 0
+        new_words = new_words[max(free, 0):]
+        if not new_words:
+            return self
+
+        # Every other new word replaces the current minimum. One heap per
+        # batch replaces the linked bucket list of the original algorithm
+        heap = [(count, word) for word, count in monitored.items()]
+        heapq.heapify(heap)
+        for word, count in new_words:
+            minimum, evicted = heap[0]
+            del monitored[evicted]
+            del errors[evicted]
+            monitored[word] = minimum + count
+            errors[word] = minimum
+            heapq.heapreplace(heap, (minimum + count, word))
+        return self
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """
+        Fold another summary into this one.
+
+        A word missing from one side is assumed to have that side's floor
+        as count and error, which keeps every estimate an upper bound and
+        every error bound valid. The `capacity` largest estimates are kept.
+
+        Args:
+            other (SpaceSaving): Summary to merge in (left unchanged)
+
+        Returns:
+            SpaceSaving: self, to allow chaining
+        """
+
+        if not isinstance(other, SpaceSaving):
+            raise TypeError(
+                f"Can only merge SpaceSaving, got {type(other).__name__} instead"
+            )
+
+        own_floor = self.floor
+        other_floor = other.floor
+        counts: Dict[str, int] = {}
+        errors: Dict[str, int] = {}
+
+        for word in self.counts.keys() | other.counts.keys():
+            counts[word] = (self.counts.get(word, own_floor)
+                            + other.counts.get(word, other_floor))
+            errors[word] = (self.errors.get(word, own_floor)
+                            + other.errors.get(word, other_floor))
+
+        self.capacity = max(self.capacity, other.capacity)
+        if len(counts) > self.capacity:
+            kept = heapq.nlargest(self.capacity, counts.items(), key=lambda x: x[1])
+            counts = dict(kept)
+            errors = {word: errors[word] for word in counts}
+
+        self.counts = counts
+        self.errors = errors
+        return self
+
+    def top(self, n: int = None) -> List[Tuple[str, int, int]]:
+        """
+        Return the n (default: all) monitored words with the highest
+        estimates, as (word, estimated_count, error) tuples sorted by
+        descending estimate, then word.
+        """
+
+        items = sorted(self.counts.items(), key=lambda x: (-x[1], x[0]))[:n]
+        return [(word, count, self.errors[word]) for word, count in items]
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __contains__(self, word) -> bool:
+        return word in self.counts
+
+
+class HyperLogLog:
+    """
+    Estimate the number of distinct words in a few kilobytes (HyperLogLog).
+
+    Each word is hashed to 64 bits. The first `precision` bits select one of
+    m = 2**precision registers, which keeps the longest run of leading zero
+    bits seen in the rest of the hash. The harmonic mean of the registers
+    gives the cardinality estimate.
+
+    Key Features:
+    - Memory: m bytes, e.g. 4 KB for the default precision of 12
+    - Relative standard error: 1.04 / sqrt(m), about 1.6% for precision 12
+      (so roughly 95% of estimates fall within 3.3% of the true count)
+    - Mergeable: the union of two sketches is the register-wise maximum
+    - Adding the same word again never changes the sketch
+
+    Hashes use BLAKE2b rather than hash(), which is randomized per process,
+    so sketches built in different workers can be merged.
+    """
+
+    def __init__(self, precision: int = 12):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            precision (int): Number of index bits, between 4 and 18.
+                Memory is 2**precision bytes.
+
+        Raises:
+            ValueError: If precision is out of range
+        """
+
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    @property
+    def error_rate(self) -> float:
+        """Relative standard error of estimate()."""
+
+        return 1.04 / len(self.registers) ** 0.5
+
+    def update(self, words: Iterable[str]) -> "HyperLogLog":
+        """
+        Add words to the sketch. Feeding distinct words (e.g. the keys of a
+        per-chunk Counter) is fastest, but duplicates are harmless.
+
+        Returns:
+            HyperLogLog: self, to allow chaining
+        """
+
+        registers = self.registers
+        shift = 64 - self.precision
+        mask = (1 << shift) - 1
+        blake2b = hashlib.blake2b
+        from_bytes = int.from_bytes
+
+        for word in words:
+            value = from_bytes(
+                blake2b(word.encode('utf-8', 'surrogatepass'), digest_size=8).digest(),
+                'big'
+            )
+            index = value >> shift
+            rank = shift - (value & mask).bit_length() + 1
+            if rank > registers[index]:
+                registers[index] = rank
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """
+        Fold another sketch into this one (estimate of the union).
+
+        Raises:
+            ValueError: If the sketches have different precisions
+        """
+
+        if not isinstance(other, HyperLogLog):
+            raise TypeError(
+                f"Can only merge HyperLogLog, got {type(other).__name__} instead"
+            )
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precisions")
+
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def estimate(self) -> int:
+        """Return the estimated number of distinct words added."""
+
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+
+        # Small range correction: linear counting while registers are empty
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))
+        return round(raw)
@@ -0,0 +1,165 @@
+"""
+Integer-ID vocabulary encoding with array-backed word counts.
+
+A Counter spends a str key and an int object on every distinct word, in
+every aggregate. Here each word is interned once in a shared Vocabulary
+that maps it to a dense integer ID, and each aggregate only keeps an
+array('Q') of counts indexed by those IDs (8 bytes per word). Aggregates
+built on the same Vocabulary have aligned IDs, so merging them is a single
+vectorized add of two arrays.
+
+NumPy is used for the vectorized add when it is installed; otherwise the
+add runs through map() over the two arrays.
+"""
+
+from array import array
+from operator import add
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+try:
+    import numpy
+except ImportError:  # optional dependency
+    numpy = None
+
+
+class Vocabulary:
+    """
+    Bidirectional mapping between words and dense integer IDs.
+
+    IDs are assigned in order of first appearance, starting at 0, and are
+    never reused, so arrays indexed by ID stay valid as the vocabulary grows.
+    """
+
+    def __init__(self):
+        """Initialize an empty vocabulary."""
+
+        # Structure: {word: id} and [word for id 0, word for id 1, ...]
+        self.ids: Dict[str, int] = {}
+        self.words: List[str] = []
+
+    def intern(self, word: str) -> int:
+        """Return the ID of word, assigning the next free one if needed."""
+
+        index = self.ids.get(word)
+        if index is None:
+            index = self.ids[word] = len(self.words)
+            self.words.append(word)
+        return index
+
+    def encode(self, words: Iterable[str]) -> List[int]:
+        """Return the IDs of words, interning the new ones."""
+
+        intern = self.intern
+        return [intern(word) for word in words]
+
+    def decode(self, ids: Iterable[int]) -> List[str]:
+        """Return the words for a sequence of IDs."""
+
+        words = self.words
+        return [words[index] for index in ids]
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word) -> bool:
+        return word in self.ids
+
+
+class VocabularyCounts:
+    """
+    Word counts stored as an array('Q') indexed by Vocabulary ID.
+
+    Drop-in frequency backend for TextStatistics (update(), merge(),
+    items(), len()); the word -> count dict is only built on output.
+    Several aggregates (e.g. one per day) should share one Vocabulary:
+    the words are then stored once and merges are aligned array adds.
+    """
+
+    def __init__(self, vocabulary: Optional[Vocabulary] = None):
+        """
+        Initialize empty counts.
+
+        Args:
+            vocabulary (Vocabulary): Vocabulary to intern words into.
+                Default: a new, private one
+        """
+
+        self.vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+        self.counts = array('Q')
+
+    def _grow(self, size: int) -> None:
+        """Extend the count array with zeros up to size entries."""
+
+        missing = size - len(self.counts)
+        if missing > 0:
+            self.counts.frombytes(bytes(missing * self.counts.itemsize))
+
+    def update(self, counts: Mapping[str, int]) -> "VocabularyCounts":
+        """
+        Add a batch of word -> count occurrences.
+
+        Returns:
+            VocabularyCounts: self, to allow chaining
+        """
+
+        intern = self.vocabulary.intern
+        ids = [intern(word) for word in counts]
+        self._grow(len(self.vocabulary))
+
+        array_counts = self.counts
+        for index, count in zip(ids, counts.values()):
+            array_counts[index] += count
+        return self
+
+    def merge(self, other: "VocabularyCounts") -> "VocabularyCounts":
+        """
+        Fold another aggregate into this one.
+
+        With a shared Vocabulary the IDs are aligned and the merge is one
+        vectorized add; otherwise other's words are re-interned first.
+
+        Returns:
+            VocabularyCounts: self, to allow chaining
+        """
+
+        if not isinstance(other, VocabularyCounts):
+            raise TypeError(
+                f"Can only merge VocabularyCounts, got {type(other).__name__} instead"
+            )
+
+        if other.vocabulary is not self.vocabulary:
+            return self.update(dict(other.items()))
+
+        size = len(other.counts)
+        self._grow(size)
+        if numpy is not None:
+            target = numpy.frombuffer(self.counts, dtype=numpy.uint64)[:size]
+            numpy.add(target, numpy.frombuffer(other.counts, dtype=numpy.uint64), out=target)
+            del target
+        else:
+            self.counts[:size] = array('Q', map(add, self.counts, other.counts))
+        return self
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """Yield (word, count) for every word with a non-zero count."""
+
+        words = self.vocabulary.words
+        for index, count in enumerate(self.counts):
+            if count:
+                yield words[index], count
+
+    def to_dict(self) -> Dict[str, int]:
+        """Return the counts as a word -> count dict (unordered)."""
+
+        return dict(self.items())
+
+    def __getitem__(self, word: str) -> int:
+        index = self.vocabulary.ids.get(word)
+        if index is None or index >= len(self.counts):
+            return 0
+        return self.counts[index]
+
+    def __len__(self) -> int:
+        # Words interned by other aggregates sharing the vocabulary have a
+        # zero count here and are not part of this aggregate
+        return len(self.counts) - self.counts.count(0)
@@ -0,0 +1,189 @@
+"""
+Word-length statistics: mean, maximum, full histogram and percentiles.
+
+With NumPy installed the cleaned text is turned into an array of code
+points once, and every token length comes out of the whitespace
+boundaries in bulk (no Python-level loop per token). Without NumPy the
+same results are computed in pure Python, so NumPy stays an optional
+extra and this module works either way.
+
+Words are cleaned and split exactly as in analyze_text(), so word_count,
+average_word_length and longest_words always match its result.
+"""
+
+import sys
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Sequence
+
+from normalization import normalize
+
+try:
+    import numpy
+except ImportError:  # optional dependency
+    numpy = None
+
+
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+BACKENDS = ("numpy", "python")
+
+
+@lru_cache(maxsize=None)
+def _whitespace_codes():
+    """Code points str.split() treats as whitespace, as a NumPy array."""
+
+    return numpy.array(
+        [code for code in range(sys.maxunicode + 1) if chr(code).isspace()],
+        dtype=numpy.uint32
+    )
+
+
+@lru_cache(maxsize=None)
+def _latin1_whitespace():
+    """Lookup table: byte value -> whether that Latin-1 character is whitespace."""
+
+    return numpy.array([chr(code).isspace() for code in range(256)], dtype=bool)
+
+
+def _word_lengths_numpy(cleaned: str):
+    """
+    Return (starts, lengths) of every word in cleaned text as NumPy arrays.
+
+    Latin-1 text is mapped to one byte per character, anything else to one
+    uint32 per code point, so positions and lengths count characters like
+    len() does.
+    """
+
+    try:
+        codes = numpy.frombuffer(cleaned.encode('latin-1'), dtype=numpy.uint8)
+        is_space = _latin1_whitespace()[codes]
+    except UnicodeEncodeError:
+        codes = numpy.frombuffer(
+            cleaned.encode('utf-32-le', 'surrogatepass'), dtype=numpy.uint32
+        )
+        is_space = numpy.isin(codes, _whitespace_codes())
+
+    # A word starts where whitespace turns into non-whitespace and ends
+    # where it turns back; padding with whitespace closes both ends
+    edges = numpy.diff(numpy.concatenate(([True], is_space, [True])).view(numpy.int8))
+    starts = numpy.flatnonzero(edges == -1)
+    ends = numpy.flatnonzero(edges == 1)
+    return starts, ends - starts
+
+
+def _percentiles(histogram: Dict[int, int], word_count: int,
+                 percentiles: Sequence[float]) -> Dict[float, int]:
+    """
+    Nearest-rank percentiles of the word lengths described by histogram:
+    the smallest length such that at least p% of the words are not longer.
+    """
+
+    result = {}
+    for p in percentiles:
+        rank = max(1, -(-word_count * p // 100))
+        cumulative = 0
+        for length, count in histogram.items():
+            cumulative += count
+            if cumulative >= rank:
+                result[p] = length
+                break
+    return result
+
+
+def _length_stats_numpy(cleaned: str) -> tuple:
+    """NumPy backend: (word_count, total_length, max_length, longest_words, histogram)."""
+
+    starts, lengths = _word_lengths_numpy(cleaned)
+    if not len(lengths):
+        return 0, 0, 0, [], {}
+
+    max_length = int(lengths.max())
+    longest = starts[lengths == max_length]
+    longest_words = sorted({cleaned[start:start + max_length] for start in longest.tolist()})
+
+    counts = numpy.bincount(lengths)
+    present = numpy.flatnonzero(counts)
+    histogram = dict(zip(present.tolist(), counts[present].tolist()))
+
+    total_length = int(numpy.dot(present, counts[present]))
+    return len(lengths), total_length, max_length, longest_words, histogram
+
+
+def _length_stats_python(cleaned: str) -> tuple:
+    """Pure-Python backend, same return value as _length_stats_numpy()."""
+
+    words = cleaned.split()
+    if not words:
+        return 0, 0, 0, [], {}
+
+    counts = Counter(map(len, words))
+    max_length = max(counts)
+    longest_words = sorted({word for word in words if len(word) == max_length})
+    histogram = dict(sorted(counts.items()))
+
+    total_length = sum(length * count for length, count in histogram.items())
+    return len(words), total_length, max_length, longest_words, histogram
+
+
+def word_length_stats(text: str,
+                      percentiles: Iterable[float] = DEFAULT_PERCENTILES,
+                      backend: Optional[str] = None) -> dict:
+    """
+    Compute word-length statistics of a text in one shot.
+
+    Args:
+        text (str): Input text to analyze
+        percentiles: Percentiles (0-100) of the word lengths to report
+        backend (str): "numpy" or "python". Default: NumPy when installed
+
+    Returns:
+        dict: Dictionary containing:
+            - word_count (int): Total number of words
+            - average_word_length (float): Average length rounded to 2 decimals
+            - max_length (int): Length of the longest words
+            - longest_words (list): All words of max_length, sorted
+            - length_histogram (dict): {length: number of words}, by length
+            - length_percentiles (dict): {p: nearest-rank percentile length}
+
+    Raises:
+        TypeError: If input is not a string
+        ValueError: If input is empty, contains no valid words, a percentile
+            is outside 0-100 or the backend is unknown
+        ImportError: If backend="numpy" but NumPy is not installed
+    """
+
+    # Input Validation
+    if not isinstance(text, str):
+        raise TypeError(f"Input must be a string, got {type(text).__name__} instead")
+
+    if not text or text.isspace():
+        raise ValueError("Input string cannot be empty or contain only whitespace")
+
+    percentiles = tuple(percentiles)
+    if any(not 0 <= p <= 100 for p in percentiles):
+        raise ValueError("percentiles must be between 0 and 100")
+
+    if backend is None:
+        backend = "python" if numpy is None else "numpy"
+    elif backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}, got {backend!r}")
+    if backend == "numpy" and numpy is None:
+        raise ImportError("The numpy backend requires NumPy (pip install numpy)")
+
+    # Length Statistics
+    cleaned = normalize(text)
+    compute = _length_stats_numpy if backend == "numpy" else _length_stats_python
+    word_count, total_length, max_length, longest_words, histogram = compute(cleaned)
+
+    if word_count == 0:
+        raise ValueError("No valid words found after removing punctuation")
+
+    return {
+        "word_count": word_count,
+        "average_word_length": round(total_length / word_count, 2),
+        "max_length": max_length,
+        "longest_words": longest_words,
+        "length_histogram": histogram,
+        "length_percentiles": _percentiles(histogram, word_count, percentiles)
+    }